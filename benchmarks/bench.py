@@ -0,0 +1,205 @@
+"""
+Offline benchmarks of the engine's own overhead, run against FakeLM so no provider is called.
+
+    python benchmarks/bench.py --output benchmarks/results/0.1.0.json
+    python benchmarks/bench.py --compare benchmarks/results/0.1.0.json
+    # opt into the large scales, this takes a while
+    python benchmarks/bench.py --scales 1000 100000
+
+Every benchmark reports the best of `--repeat` runs in seconds and the items per second.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import dspy
+
+from seevals.__about__ import __version__
+from seevals import agents, agent_util, utils
+from seevals import data_types as types
+from seevals.execute import run_parallel
+from seevals.fake_lm import FakeLM, lognormal_latency
+from seevals.path_utils import path_exists_in_model
+from import_time import ENTRY_POINTS, measure_import
+
+WORDS = ("soil nitrogen rainfall pest spacing variety traffic curb bus parent clinic cost "
+         "incentive risk reminder bed staffing discharge zoning rate wage transit rental").split()
+
+
+def synthetic_plans(n: int, entities: int = 12, relationships: int = 12, seed: int = 42) -> List[agents.AnalysisPlanningResult]:
+    """Random but well formed analysis plans, large enough to sample 5 entities and relationships from."""
+    rng = random.Random(seed)
+    plans = []
+    for _ in range(n):
+        index = [agents.MetaAnalysisEntity(name=f"{rng.choice(WORDS)}-{j}", type=rng.choice(WORDS))
+                 for j in range(entities)]
+        plans.append(agents.AnalysisPlanningResult(
+            analysis_overview=" ".join(rng.choices(WORDS, k=80)),
+            analysis_indices=agents.MetaAnalysisIndices(
+                subsections_index=[" ".join(rng.choices(WORDS, k=3))
+                                   for _ in range(6)],
+                entities_index=index,
+                relationships_index=[(rng.choice(index), rng.choice(index))
+                                     for _ in range(relationships)])))
+    return plans
+
+
+def eval_config() -> types.EvalConfig:
+    rubric = types.Rubric(ge=0, le=3, desc="Entities described have logical types",
+                          scale="0 is not logical, 1 is partially consistent, 2 is consistent, 3 is perfectly consistent")
+    config = types.EvalDatasetBuilder.build(agents.AnalysisPlanningResult)
+    config.add("$.analysis_overview", None,
+               types.View(views=["$.analysis_indices.relationships_index"]), rubric)
+    config.add("$.analysis_indices.entities_index", types.Sample(num_samples=5),
+               types.View(views=["$.analysis_overview"]), rubric)
+    return config
+
+
+class Noop(dspy.Module):
+    def forward(self, args):
+        return dspy.Prediction(value=args)
+
+    def get_value(self, prediction: dspy.Prediction):
+        return prediction.value
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"best": min(times), "median": statistics.median(times)}
+
+
+def bench_run_parallel(n: int, repeat: int) -> Dict[str, Dict]:
+    criteria = types.Criteria(
+        rubrics=[types.Rubric(ge=0, le=3, desc="Entities described have logical types")], max_total_score=3)
+    inputs = agent_util.make_grading_inputs(
+        criteria, [types.ViewProjection(item=i) for i in range(n)])
+    grader = agents.make_semantic_grader(types.ViewProjection)
+    instant = FakeLM({"reasoning": "ok", "score": 2.0})
+    slow = FakeLM({"reasoning": "ok", "score": 2.0},
+                  latency=lognormal_latency(0.02, 0.8), error_rate=0.0)
+    slow_n = min(n, 500)
+    return {
+        "run_parallel.dispatch": {"n": n, **measure(lambda: run_parallel(Noop(), inputs, instant, 16), repeat)},
+        "run_parallel.grader": {"n": n, **measure(lambda: run_parallel(grader, inputs, instant, 16), repeat)},
+        # ideal is slow_n * median / concurrency, the gap is the tail plus dispatch
+        "run_parallel.grader_lognormal_20ms": {
+            "n": slow_n, "ideal": slow_n * 0.02 / 32,
+            **measure(lambda: run_parallel(grader, inputs[:slow_n], slow, 32), repeat)},
+    }
+
+
+def bench_apply(plans: List[agents.AnalysisPlanningResult], repeat: int) -> Dict[str, Dict]:
+    config = eval_config()
+    return {f"eval_config.apply.{len(plans)}": {"n": len(plans), **measure(lambda: config.apply(plans), repeat)}}
+
+
+def bench_io(plans: List[agents.AnalysisPlanningResult], repeat: int) -> Dict[str, Dict]:
+    n = len(plans)
+    response = types.ResponseData(data=plans, debug=[None] * n)
+    dataset = eval_config().apply(plans)
+    with tempfile.TemporaryDirectory() as tmp:
+        results_path = os.path.join(tmp, "results.jsonl")
+        dataset_path = os.path.join(tmp, "evaluation_dataset.jsonl")
+        return {
+            f"write_results_from_response.{n}": {"n": n, **measure(
+                lambda: utils.write_results_from_response(results_path, response), repeat)},
+            f"load_from_result.{n}": {"n": n, **measure(
+                lambda: utils.load_from_result(results_path, agents.AnalysisPlanningResult), repeat)},
+            f"write_eval_dataset.{n}": {"n": n, **measure(
+                lambda: utils.write_eval_dataset(dataset_path, dataset), repeat)},
+        }
+
+
+def bench_paths(repeat: int) -> Dict[str, Dict]:
+    paths = ["$.analysis_overview", "$.analysis_indices.entities_index",
+             "$.analysis_indices.relationships_index", "$.analysis_indices.missing"] * 25
+    return {"path_exists_in_model": {"n": len(paths), **measure(
+        lambda: [path_exists_in_model(agents.AnalysisPlanningResult, path) for path in paths], repeat)}}
+
+
+def bench_compositions(repeat: int) -> Dict[str, Dict]:
+    N, k = 30, 4
+    total = len(utils.weak_compositions_array(N, k))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "compositions.dat")
+        return {
+            "iter_weak_compositions": {"n": total, **measure(lambda: sum(1 for _ in utils.iter_weak_compositions(N, k)), repeat)},
+            "for_each_weak_composition": {"n": total, **measure(lambda: utils.for_each_weak_composition(N, k, lambda buf: None), repeat)},
+            "weak_compositions_array": {"n": total, **measure(lambda: utils.weak_compositions_array(N, k), repeat)},
+            "dump_to_memmap": {"n": total, **measure(lambda: utils.dump_to_memmap(N, k, path), repeat)},
+        }
+
+
+def bench_imports(repeat: int) -> Dict[str, Dict]:
+    return {f"import.{name}": {"n": 1, "best": (result := measure_import(statement, repeat))["seconds"],
+                               "heavy": result["heavy"]}
+            for name, statement in ENTRY_POINTS.items()}
+
+
+def run(scales: List[int], repeat: int) -> Dict:
+    results: Dict[str, Dict] = {}
+    results.update(bench_imports(repeat))
+    results.update(bench_run_parallel(min(scales), repeat))
+    results.update(bench_paths(repeat))
+    results.update(bench_compositions(repeat))
+    for scale in scales:
+        plans = synthetic_plans(scale)
+        results.update(bench_apply(plans, repeat))
+        results.update(bench_io(plans, repeat))
+    for result in results.values():
+        result["per_second"] = result["n"] / result["best"] if result["best"] else float("inf")
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "dspy": dspy.__version__,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict):
+    print(f"{'benchmark':45} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:45} {'-':>10} {result['best']:>10.4f}")
+            continue
+        print(f"{name:45} {before['best']:>10.4f} {result['best']:>10.4f} {result['best'] / before['best']:>7.2f}")
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None,
+                        help="defaults to benchmarks/results/<version>.json")
+    parser.add_argument("--compare", default=None,
+                        help="a previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    current = run(args.scales, args.repeat)
+    output = args.output or os.path.join(os.path.dirname(__file__), "results", f"{current['version']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"wrote {output}")
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(current, json.load(f))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
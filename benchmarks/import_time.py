@@ -0,0 +1,67 @@
+"""
+Import-time regression check, fails when the light entry points pull in a heavy dependency
+or take longer than the budget.
+
+    python benchmarks/import_time.py --budget 0.5
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+HEAVY_MODULES = ["dspy", "litellm", "scipy", "jsonpath_ng", "pandas"]
+
+# each entry point runs in a fresh interpreter so nothing is cached between them
+ENTRY_POINTS = {
+    "import seevals": "import seevals",
+    "seevals.calc_serfling_error": "import seevals; seevals.calc_serfling_error",
+    "seevals.utils.load_from": "from seevals.utils import load_from, write_eval_dataset, calc_hoeffding_error",
+}
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(statement: str, repeat: int = 3) -> Dict:
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+                             capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {"seconds": min(run["seconds"] for run in runs), "heavy": runs[0]["heavy"]}
+
+
+def check(budget: float, repeat: int = 3) -> List[str]:
+    failures = []
+    for name, statement in ENTRY_POINTS.items():
+        result = measure_import(statement, repeat)
+        print(f"{name:35} {result['seconds']:.3f}s heavy={result['heavy']}")
+        if result["heavy"]:
+            failures.append(f"{name} imported {', '.join(result['heavy'])}")
+        if result["seconds"] > budget:
+            failures.append(
+                f"{name} took {result['seconds']:.3f}s, over the {budget}s budget")
+    return failures
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=0.5,
+                        help="the maximum import time in seconds of each entry point")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    failures = check(args.budget, args.repeat)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
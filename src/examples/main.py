@@ -8,6 +8,8 @@ import dspy
 import seevals.utils as utils
 import seevals.agent_util as agent_util
 import seevals.agents as agents
+import seevals.dedup as dedup
+import seevals.incremental as incremental
 from seevals.execute import run_parallel
 import seevals.data_types as types
 from seevals.agents import ScenarioArgs
@@ -66,6 +68,19 @@ evaluation_dataset = eval.apply(results.data, seed=47)
 
 utils.write_eval_dataset('./evaluation_dataset.jsonl', evaluation_dataset)
 
+# grade each sampled item with only its data and view in the prompt, items graded
+# by a previous run with the same rubric and view reuse their grade
+view_grader = agents.make_semantic_grader(types.ViewProjection)
+manifest = incremental.GradeManifest(
+    './grades_manifest.jsonl', namespace=incremental.grader_namespace(view_grader, lm))
+manifest.apply(evaluation_dataset)
+view_grading_inputs = agent_util.make_view_grading_inputs(
+    evaluation_dataset, skip_scored=True)
+view_grades = run_parallel(view_grader, view_grading_inputs, lm, 20)
+agent_util.apply_view_scores(evaluation_dataset, view_grades, skip_scored=True)
+manifest.record(evaluation_dataset)
+utils.write_eval_dataset('./evaluation_dataset.jsonl', evaluation_dataset)
+
 pdb.set_trace()
 """
 for each entry in the result, we extract the item,
@@ -116,7 +131,7 @@ types.SampleCriteria(sample_fields=sample_fields, e=0.2, confidence=0.95)
 # SampleCriteria
 
 
-criteria = types.Criteria(rubrics=rubrics, max_total_score=6)
+criteria = types.Criteria(rubrics=rubrics, max_total_score=8)
 
 # criteria =types.Criteria(rubrics=rubrics,max_total_score=100)
 
@@ -125,9 +140,13 @@ results = utils.load_from_result(
     './results.jsonl', agents.AnalysisPlanningResult)
 input_data = list(map(lambda val: val, results))
 
-grading_inputs = agent_util.make_grading_inputs(criteria, results)
+# grade one representative per cluster of near-identical results
+duplicates = dedup.dedup_results(
+    results, ["$.analysis_overview", "$.analysis_indices"], threshold=0.9)
+grading_inputs = agent_util.make_grading_inputs(
+    criteria, duplicates.select(results))
 grader = agents.make_semantic_grader(agents.AnalysisPlanningResult)
-grades = run_parallel(grader, grading_inputs, lm, 20)
+grades = duplicates.expand(run_parallel(grader, grading_inputs, lm, 20))
 
 noise_factor = 0.1
 contrastive_inputs = agents.from_grading_inputs(grading_inputs, noise_factor)
@@ -0,0 +1,37 @@
+import dspy
+import seevals.utils as utils
+import seevals.agents as agents
+import seevals.data_types as types
+from seevals.pipeline import Stage, run_pipeline
+
+lm = dspy.LM(
+    model="openai/bedrock-sonnet-37",
+    api_base="http://localhost:4000",
+    api_key="noop",
+)
+
+rubrics = [
+    types.Rubric(ge=0, le=2, desc="Plan overview is consistent with relationships",
+                 scale="0 is not consistent, 1 is partially consistent, 2 is consistent"),
+    types.Rubric(ge=0, le=3, desc="Entities described have logical types",
+                 scale="0 is not logical, 1 is partially consistent, 2 is consistent, 3 is perfectly consistent"),
+    types.Rubric(ge=0, le=3, desc="Relationships make logical sense",
+                 scale="0 is not logical, 1 is partially logical, 2 is mostly logical, 3 is perfectly logical"),
+]
+criteria = types.Criteria(rubrics=rubrics, max_total_score=6)
+noise_factor = 0.1
+
+scenarios = utils.load_from("./scenarios.jsonl", agents.ScenarioArgs)
+
+# every generated plan is graded and contrasted as soon as it is generated
+results, grades, contrastive_outputs = run_pipeline([
+    Stage(module=agents.InterviewGenerationModule(), lm=lm, concurrency=4),
+    Stage(module=agents.make_semantic_grader(agents.AnalysisPlanningResult), lm=lm, concurrency=20,
+          prepare=lambda scenario, result: agents.GradingInput(criteria=criteria, input=result)),
+    Stage(module=agents.make_contrastive_grader(agents.AnalysisPlanningResult), lm=lm, concurrency=20,
+          prepare=lambda grading_input, score: agents.from_grading_input(grading_input, noise_factor)),
+], scenarios)
+
+utils.write_results_from_response('./results.jsonl', results)
+utils.write_results_from_response(
+    './contrastive_outputs.jsonl', contrastive_outputs, criteria)
@@ -1,5 +1,32 @@
-from .utils import calc_hoeffding_error, calc_serfling_error
-from . import utils, data_types, agents, execute, agent_util
+import importlib
+from typing import TYPE_CHECKING
+
+# submodules and helpers are imported on first access so that e.g. the stats and
+# I/O helpers in utils don't pay for dspy, litellm, scipy or jsonpath_ng
+_submodules = {
+    "utils",
+    "data_types",
+    "agents",
+    "execute",
+    "agent_util",
+    "dedup",
+    "pipeline",
+    "fake_lm",
+    "budget",
+    "scheduler",
+    "hedging",
+    "work_queue",
+    "incremental",
+    "matrix",
+    "aggregate",
+    "manual_grader",
+    "schema",
+    "prompts",
+}
+_attributes = {
+    "calc_hoeffding_error": "utils",
+    "calc_serfling_error": "utils",
+}
 
 __all__ = [
     "calc_hoeffding_error",
@@ -8,5 +35,35 @@ __all__ = [
     "data_types",
     "agents",
     "execute",
-    "agent_util"
+    "agent_util",
+    "dedup",
+    "pipeline",
+    "fake_lm",
+    "budget",
+    "scheduler",
+    "hedging",
+    "work_queue",
+    "incremental",
+    "matrix",
+    "aggregate",
+    "manual_grader",
+    "schema",
+    "prompts"
 ]
+
+if TYPE_CHECKING:
+    from .utils import calc_hoeffding_error, calc_serfling_error
+    from . import utils, data_types, agents, execute, agent_util, dedup, pipeline, fake_lm, budget, scheduler, hedging, work_queue, incremental, matrix, aggregate, manual_grader, schema, prompts
+
+
+def __getattr__(name: str):
+    if name in _submodules:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _attributes:
+        module = importlib.import_module(f".{_attributes[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,5 +1,8 @@
-from typing import TypeVar, List
+from typing import Type, TypeVar, List, Iterator, Tuple
+import numpy as np
+import pydantic
 from . import data_types as types
+from .path_utils import resolve_view
 Val = TypeVar('Val')
 
 
@@ -7,3 +10,78 @@ def make_grading_inputs(criteria: types.Criteria, inputs: List[Val]) -> List[typ
     grading_inputs = map(lambda val: types.GradingInput[Val](criteria=criteria, input=val),
                          inputs)
     return list(grading_inputs)
+
+
+def iter_eval_items(eval_dataset: List[types.EvalData]) -> Iterator[Tuple[types.EvalData, types.EvalDatum, types.EvalItem]]:
+    for eval_data in eval_dataset:
+        for datum in eval_data.data:
+            for item in datum.items:
+                yield eval_data, datum, item
+
+
+def make_view_grading_inputs(eval_dataset: List[types.EvalData], skip_scored: bool = False) -> List[types.GradingInput[types.ViewProjection]]:
+    """
+    Build one grading input per eval item from only the item's data and its resolved view paths,
+    graded against the rubric of the datum it belongs to. With `skip_scored` items that
+    already have a score are left out.
+    """
+    grading_inputs = []
+    criteria_by_datum = {}
+    views_by_data = {}
+    for eval_data, datum, item in iter_eval_items(eval_dataset):
+        if skip_scored and item.score is not None:
+            continue
+        criteria = criteria_by_datum.get(id(datum))
+        if criteria is None:
+            criteria = types.Criteria(
+                rubrics=[datum.rubric], max_total_score=datum.rubric.le)
+            criteria_by_datum[id(datum)] = criteria
+        # sampled items of a datum share their view, so resolve it once per instance
+        view_key = (id(eval_data), tuple(item.view.views))
+        view = views_by_data.get(view_key)
+        if view is None:
+            view = resolve_view(eval_data.raw_data, item.view.views)
+            views_by_data[view_key] = view
+        grading_inputs.append(types.GradingInput[types.ViewProjection](
+            criteria=criteria,
+            input=types.ViewProjection(item=item.data, view=view)))
+    return grading_inputs
+
+
+def apply_view_scores(eval_dataset: List[types.EvalData], grades: types.ResponseData[float], skip_scored: bool = False) -> List[types.EvalData]:
+    """
+    Write the grades of `make_view_grading_inputs` back to `EvalItem.score`, must be called
+    with the same `skip_scored` the inputs were built with.
+    """
+    items = [item for _, _, item in iter_eval_items(eval_dataset)
+             if not skip_scored or item.score is None]
+    if len(items) != len(grades.data):
+        raise ValueError(
+            f"Expected {len(items)} grades but got {len(grades.data)}")
+    for item, score in zip(items, grades.data):
+        item.score = score
+    return eval_dataset
+
+
+def score_matrix(grades: types.ResponseData[pydantic.BaseModel], scores_type: Type[pydantic.BaseModel]) -> np.ndarray:
+    """
+    Stack the per rubric scores of a rubric grading run into an (items, rubrics) matrix,
+    rows of failed items are NaN.
+    """
+    fields = list(scores_type.model_fields)
+    matrix = np.full((len(grades.data), len(fields)), np.nan)
+    for row, scores in enumerate(grades.data):
+        if scores is not None:
+            matrix[row] = [getattr(scores, field) for field in fields]
+    return matrix
+
+
+def flatten_variants(variants: types.ResponseData[List[Val]]) -> types.ResponseData[Val]:
+    """Flatten a multi-variant run into one entry per variant, a failed input contributes a single None."""
+    data = []
+    debug = []
+    for values, prediction in zip(variants.data, variants.debug):
+        for value in values if values is not None else [None]:
+            data.append(value)
+            debug.append(prediction)
+    return types.ResponseData(data=data, debug=debug)
@@ -1,11 +1,15 @@
+import math
+import re
+import threading
 import dspy
 import pydantic
 from dataclasses import dataclass
 from pydantic import Field
-from typing import Sequence, Annotated, Unpack, List, Tuple, TypedDict, Type, TypeVar, Generic, Callable
+from typing import Sequence, Annotated, Unpack, List, Tuple, TypedDict, Type, TypeVar, Generic, Callable, ClassVar, Optional
 from dspy import InputField, OutputField
 import numpy as np
 from . import data_types as types
+from .schema import compact_schema
 
 
 class QA(pydantic.BaseModel):
@@ -89,7 +93,7 @@ class InterviewAnalysis(dspy.Signature):
     scenario: str = InputField(
         decription="The tokenomic or economic scenario to analyze")
     interview = InputField(
-        desc=f"An interview questions and answers to use to complete the analysis, in this format {QABaseModel.model_json_schema()}")
+        desc=f"An interview questions and answers to use to complete the analysis, in this format {compact_schema(QABaseModel)}")
     history = InputField(
         description="The history of the analysis so far")
     continuation = InputField(
@@ -137,12 +141,79 @@ def make_ordered_score_tuple(
 ) -> Type[tuple]:
 
     # 1) Build each Annotated float type
-    types = tuple(
-        Annotated[str, rubric]
+    score_types = tuple(
+        Annotated[float, Field(ge=rubric.ge, le=rubric.le,
+                               description=rubric.desc)]
         for rubric in rubrics
     )
     # 2) Dynamically subscribe Tuple[...] to that tuple of types
-    return type(types)
+    return Tuple[score_types]
+
+
+SCALE_LEVEL = re.compile(r"(?:^|[,;])\s*(-?\d+(?:\.\d+)?)\s+is\b")
+
+
+def parse_scale_levels(scale: Optional[str]) -> List[float]:
+    """Parse the discrete levels out of a scale such as "0 is not logical, 1 is partially logical"."""
+    if scale is None:
+        return []
+    return [float(level) for level in SCALE_LEVEL.findall(scale)]
+
+
+def score_levels(criteria: types.Criteria) -> List[float]:
+    """
+    The total scores the criteria can award: sums of one level per rubric, a rubric's levels are its
+    scale levels, otherwise the whole numbers between its bounds and the bounds themselves.
+    """
+    totals = {0.0}
+    for rubric in criteria.rubrics:
+        levels = parse_scale_levels(rubric.scale) or sorted(
+            {rubric.ge, rubric.le, *range(math.ceil(rubric.ge), math.floor(rubric.le) + 1)})
+        totals = {total + level for total in totals for level in levels}
+    if criteria.max_total_score > 0:
+        totals = {total for total in totals if total <= criteria.max_total_score}
+    return sorted(totals)
+
+
+class RubricScores(pydantic.BaseModel):
+    """Base of the models built by `make_rubric_scores_model`."""
+    max_total_score: ClassVar[float] = 0
+
+    @property
+    def total(self) -> float:
+        return sum(getattr(self, name) for name in type(self).model_fields)
+
+    @property
+    def exceeds_max_total(self) -> bool:
+        return self.max_total_score > 0 and self.total > self.max_total_score
+
+
+def make_rubric_scores_model(criteria: types.Criteria) -> Type[RubricScores]:
+    """
+    Build a pydantic model with one bounded score field per rubric, named rubric_0..rubric_n in rubric order.
+    Scores outside the bounds or off a parseable scale are snapped to the nearest allowed level rather
+    than rejected, a parse error would fail the call. A sum above `max_total_score` is flagged by
+    `exceeds_max_total`.
+    """
+    fields = {}
+    validators = {}
+    for i, rubric in enumerate(criteria.rubrics):
+        name = f"rubric_{i}"
+        desc = rubric.desc if rubric.scale is None else f"{rubric.desc} ({rubric.scale})"
+        fields[name] = (float, Field(ge=rubric.ge, le=rubric.le, description=desc))
+        validators[f"snap_{name}"] = pydantic.field_validator(name, mode="before")(
+            _make_snap(rubric.ge, rubric.le, parse_scale_levels(rubric.scale)))
+
+    model = pydantic.create_model("RubricScores", __base__=RubricScores, __validators__=validators, **fields)
+    model.max_total_score = criteria.max_total_score
+    return model
+
+
+def _make_snap(ge: float, le: float, levels: List[float]) -> Callable[[Type[pydantic.BaseModel], float], float]:
+    def snap(cls, value: float) -> float:
+        value = min(max(float(value), ge), le)
+        return min(levels, key=lambda level: abs(level - value)) if levels else value
+    return snap
 
 
 class SemanticSignature[V](dspy.Signature):
@@ -153,6 +224,18 @@ class SemanticSignature[V](dspy.Signature):
         description="The score of how the input meets the criteria")
 
 
+class RubricScoresSignature(dspy.Signature):
+    """
+    Grade the input against each rubric of the criteria independently, respecting each rubric's bounds and scale.
+    Return one score per rubric in the order the rubrics are given.
+    """
+    criteria: types.Criteria = InputField(
+        description="The criteria for grading")
+    input = InputField(description="The input to be graded")
+    scores: pydantic.BaseModel = OutputField(
+        description="The score of how the input meets each rubric")
+
+
 class ContrastiveSignature[V, O](dspy.Signature):
     """
     Your goal is to modify the input to fail the criteria, and return the modified input as output.
@@ -168,6 +251,32 @@ class ContrastiveSignature[V, O](dspy.Signature):
         description="The modified input, to meet the contrastive criteria")
 
 
+Out = TypeVar('Out')
+
+
+class ContrastiveVariant(pydantic.BaseModel, Generic[Out]):
+    noise_factor: float = Field(
+        description="The noise factor the input was modified by")
+    output: Out = Field(
+        description="The modified input for this noise factor")
+
+
+class MultiContrastiveSignature(dspy.Signature):
+    """
+    Your goal is to modify the input to fail the criteria, once for every noise factor given, and return the modified inputs as variants.
+    How much each variant fails the criteria is determined by its noise factor. Use the noise factor to
+    adjust the input to impact the score of how the input meets the criteria by that amount.
+    Return exactly one variant per noise factor, in the order the noise factors are given, each tagged with its noise factor.
+    """
+    criteria: types.Criteria = InputField(
+        description="The criteria for grading")
+    noise_factors: List[float] = InputField(
+        description="The noise factors, one for each variant to produce")
+    input = InputField(description="The input to be modified")
+    variants: List[ContrastiveVariant] = OutputField(
+        description="One modified input for each noise factor")
+
+
 T = TypeVar('T')
 
 
@@ -182,6 +291,12 @@ class ContrastiveInput[T](TypedDict):
     input: T
 
 
+class MultiContrastiveInput[T](TypedDict):
+    criteria: types.Criteria
+    noise_factors: List[float]
+    input: T
+
+
 C = TypeVar('C')
 
 
@@ -208,6 +323,105 @@ def make_semantic_grader(InputType: Type[I]) -> GraderGenerationModule[I]:
     return GraderGenerationModule(InputType)
 
 
+class CascadeGraderModule(dspy.Module, Generic[I]):
+    """
+    Grades with a cheap LM first, optionally taking `samples` self-consistency samples, and only
+    escalates to the expensive LM when the cheap scores spread by more than `tolerance`, or their
+    mean falls outside the bounds of the criteria or within `margin` of one of the `boundaries`.
+    Without `boundaries` they are the midpoints between the total scores the criteria of the input
+    can award (see `score_levels`) and the margin defaults to a quarter of the smallest gap between
+    them, so a cheap score that is not clearly one of the levels escalates. The LMs are set per call
+    so the LM passed to `run_parallel` is not used.
+    """
+
+    def __init__(self, input_type: Type[I], cheap_lm: dspy.LM, expensive_lm: dspy.LM,
+                 samples: int = 1, tolerance: float = 0.0, boundaries: Optional[Sequence[float]] = None,
+                 margin: Optional[float] = None, temperature: float = 1.0):
+        if samples < 1:
+            raise ValueError(f"Expected at least 1 sample but got {samples}")
+        self.grader = dspy.ChainOfThought(
+            SemanticSignature[GradingInput[input_type]])
+        self.cheap_lm = cheap_lm
+        self.expensive_lm = expensive_lm
+        self.samples = samples
+        self.tolerance = tolerance
+        self.boundaries = None if boundaries is None else list(boundaries)
+        self.margin = margin
+        self.temperature = temperature
+        self._lock = threading.Lock()
+        self.graded = 0
+        self.escalated = 0
+
+    def should_escalate(self, scores: List[float], criteria: Optional[types.Criteria] = None) -> bool:
+        if max(scores) - min(scores) > self.tolerance:
+            return True
+        mean = sum(scores) / len(scores)
+        boundaries = self.boundaries
+        margin = self.margin
+        if boundaries is None and criteria is not None and criteria.rubrics:
+            levels = score_levels(criteria)
+            if mean < levels[0] or mean > levels[-1]:
+                return True
+            boundaries = [(low + high) / 2 for low, high in zip(levels, levels[1:])]
+            if margin is None and len(levels) > 1:
+                margin = min(high - low for low, high in zip(levels, levels[1:])) / 4
+        return any(abs(mean - boundary) <= (margin or 0.0) for boundary in boundaries or ())
+
+    def forward(self, input: GradingInput[I]) -> dspy.Prediction:
+        with dspy.context(lm=self.cheap_lm):
+            if self.samples == 1:
+                predictions = [self.grader(**input)]
+            else:
+                # bypass the cache so the samples are independent draws at the same temperature
+                predictions = [self.grader(**input, config=dict(temperature=self.temperature, cache=False))
+                               for _ in range(self.samples)]
+        cheap_scores = [prediction.score for prediction in predictions]
+        escalated = self.should_escalate(cheap_scores, input['criteria'])
+        if escalated:
+            with dspy.context(lm=self.expensive_lm):
+                prediction = self.grader(**input)
+            score = prediction.score
+        else:
+            prediction = predictions[0]
+            score = sum(cheap_scores) / len(cheap_scores)
+
+        with self._lock:
+            self.graded += 1
+            self.escalated += int(escalated)
+        return dspy.Prediction(score=score, reasoning=prediction.reasoning,
+                               cheap_scores=cheap_scores, escalated=escalated)
+
+    def get_value(self, prediction: dspy.Prediction) -> float:
+        return prediction.score
+
+    @property
+    def escalation_rate(self) -> float:
+        with self._lock:
+            return self.escalated / self.graded if self.graded else 0.0
+
+
+def make_cascade_grader(InputType: Type[I], cheap_lm: dspy.LM, expensive_lm: dspy.LM, **kwargs) -> CascadeGraderModule[I]:
+    return CascadeGraderModule(InputType, cheap_lm, expensive_lm, **kwargs)
+
+
+class RubricGraderModule(dspy.Module, Generic[I]):
+    def __init__(self, input_type: Type[I], criteria: types.Criteria):
+        self.scores_type = make_rubric_scores_model(criteria)
+        signature = RubricScoresSignature.with_updated_fields(
+            "input", type_=input_type).with_updated_fields("scores", type_=self.scores_type)
+        self.grader = dspy.ChainOfThought(signature)
+
+    def forward(self, input: GradingInput[I]) -> dspy.Prediction:
+        return self.grader(**input)
+
+    def get_value(self, prediction: dspy.Prediction) -> pydantic.BaseModel:
+        return prediction.scores
+
+
+def make_rubric_grader(InputType: Type[I], criteria: types.Criteria) -> RubricGraderModule[I]:
+    return RubricGraderModule(InputType, criteria)
+
+
 class GraderContrastiveModule(dspy.Module, Generic[I]):
     def __init__(self, input_type: Type[I]):
         self.contrast = dspy.ChainOfThought(
@@ -240,6 +454,51 @@ def make_contrastive_grader(InputType: Type[I]) -> GraderContrastiveModule[I]:
     return GraderContrastiveModule(InputType)
 
 
+class MultiContrastiveModule(dspy.Module, Generic[I]):
+    def __init__(self, input_type: Type[I]):
+        signature = MultiContrastiveSignature.with_updated_fields(
+            "input", type_=input_type).with_updated_fields(
+            "variants", type_=List[ContrastiveVariant[input_type]])
+        self.contrast = dspy.ChainOfThought(signature)
+
+    def forward(self, input: MultiContrastiveInput[I]) -> dspy.Prediction:
+        prediction = self.contrast(**input)
+        prediction.noise_factors = input['noise_factors']
+        return prediction
+
+    def get_value(self, prediction: dspy.Prediction) -> List[ContrastiveVariant[I]]:
+        """The variants in the order of the requested noise factors, tagged with the exact requested factor."""
+        noise_factors = prediction.noise_factors
+        variants = prediction.variants
+        if len(variants) != len(noise_factors):
+            raise ValueError(
+                f"Expected {len(noise_factors)} variants but got {len(variants)}")
+        # the LM may echo rounded factors, so pair requested and returned factors by rank
+        requested = sorted(range(len(noise_factors)),
+                           key=lambda i: noise_factors[i])
+        returned = sorted(variants, key=lambda variant: variant.noise_factor)
+        ordered: List[ContrastiveVariant[I] | None] = [None] * len(variants)
+        for i, variant in zip(requested, returned):
+            ordered[i] = variant.model_copy(
+                update={'noise_factor': noise_factors[i]})
+        return ordered
+
+
+def from_grading_inputs_multi(inputs: Sequence[GradingInput[In]], mean_noise_factors: Sequence[float], rng: np.random.Generator, scale: float = 0.02) -> List[MultiContrastiveInput[In]]:
+    """
+    Jitter each noise level with a normal of std `scale`, which should stay well below the gaps
+    between the levels so they keep their order and meaning, `scale=0` passes them through exactly.
+    """
+    noise_factors = rng.normal(loc=mean_noise_factors, scale=scale, size=(
+        len(inputs), len(mean_noise_factors)))
+    return [MultiContrastiveInput(criteria=input['criteria'], input=input['input'], noise_factors=factors.tolist())
+            for input, factors in zip(inputs, noise_factors)]
+
+
+def make_multi_contrastive_grader(InputType: Type[I]) -> MultiContrastiveModule[I]:
+    return MultiContrastiveModule(InputType)
+
+
 class InterviewGenerationModule(dspy.Module):
     def __init__(self):
         self.analysis_plan = dspy.ChainOfThought(AnalysisPlanning)
@@ -0,0 +1,192 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from . import data_types as types
+from . import utils
+from .agent_util import iter_eval_items
+from .path_utils import resolve_view
+
+COLUMNS = ["group_id", "item_id", "rubric", "ge", "le", "score", "normalized", "model", "noise_factor"]
+
+
+def _score(value: Any) -> float:
+    if value is None:
+        return np.nan
+    return float(getattr(value, "score", value))
+
+
+def _normalize(columns: Dict[str, List[Any]]) -> pd.DataFrame:
+    order = list(columns)
+    columns.pop("normalized")
+    frame = pd.DataFrame(columns)
+    frame["normalized"] = (frame["score"] - frame["ge"]) / \
+        (frame["le"] - frame["ge"])
+    for column in ("group_id", "rubric", "model"):
+        frame[column] = frame[column].astype("category")
+    return frame[order]
+
+
+def eval_frame(eval_dataset: List[types.EvalData], model: str = "") -> pd.DataFrame:
+    """
+    One row per eval item with the COLUMNS plus `instance`, `path`, `num_samples` and `population`,
+    the size of the list a sampled item was drawn from (NaN for items that are not sampled),
+    unscored items have a NaN score.
+    """
+    columns: Dict[str, List[Any]] = {name: [] for name in [
+        "instance", "path", *COLUMNS, "num_samples", "population"]}
+    instances: Dict[int, int] = {}
+    populations: Dict[int, int] = {}
+    for eval_data, datum, item in iter_eval_items(eval_dataset):
+        path = item.id.rsplit("[", 1)[0] if item.sample is not None else item.id
+        if id(datum) not in populations:
+            populations[id(datum)] = np.nan if item.sample is None else len(
+                resolve_view(eval_data.raw_data, [path])[path])
+        columns["instance"].append(
+            instances.setdefault(id(eval_data), len(instances)))
+        columns["path"].append(path)
+        columns["group_id"].append(datum.group_id)
+        columns["item_id"].append(item.id)
+        columns["rubric"].append(datum.rubric.desc)
+        columns["ge"].append(datum.rubric.ge)
+        columns["le"].append(datum.rubric.le)
+        columns["score"].append(_score(item.score))
+        columns["model"].append(model)
+        columns["noise_factor"].append(np.nan)
+        columns["num_samples"].append(
+            item.sample.num_samples if item.sample is not None else 1)
+        columns["population"].append(populations[id(datum)])
+    return _normalize(columns)
+
+
+def grade_frame(grades: types.ResponseData, criteria: types.Criteria | Sequence[types.Criteria],
+                noise_factors: Optional[Sequence[Optional[float]]] = None, model: str = "",
+                score: Optional[Callable[[Any], float]] = None) -> pd.DataFrame:
+    """
+    One row per grade of a `run_parallel` grading run with the COLUMNS, bounded by the criteria of
+    each input. For contrastive runs pass the noise factor of every graded output, e.g.
+    `[input['noise_factor'] for input in contrastive_inputs]` or, for flattened multi-contrastive
+    variants, `[variant and variant.noise_factor for variant in variants.data]`.
+    """
+    n = len(grades.data)
+    criteria_list = [criteria] * n if isinstance(criteria,
+                                                 types.Criteria) else list(criteria)
+    score = score or _score
+    columns: Dict[str, List[Any]] = {name: [] for name in COLUMNS}
+    for i, (value, c) in enumerate(zip(grades.data, criteria_list)):
+        columns["group_id"].append(str(i))
+        columns["item_id"].append(str(i))
+        columns["rubric"].append(" | ".join(rubric.desc for rubric in c.rubrics))
+        columns["ge"].append(sum(rubric.ge for rubric in c.rubrics))
+        # an unset max_total_score (0) means the sum of the rubric maxima
+        columns["le"].append(c.max_total_score if c.max_total_score > 0
+                             else sum(rubric.le for rubric in c.rubrics))
+        columns["score"].append(np.nan if value is None else score(value))
+        columns["model"].append(model)
+    columns["noise_factor"] = [np.nan if f is None else f for f in noise_factors] \
+        if noise_factors is not None else [np.nan] * n
+    return _normalize(columns)
+
+
+def _groups(frame: pd.DataFrame, by: Sequence[str]):
+    # an empty `by` aggregates the whole frame into one "all" row
+    return frame.groupby(list(by) if by else np.zeros(len(frame), dtype=int), observed=True, sort=True)
+
+
+def summarize(frame: pd.DataFrame, by: Sequence[str] = ("rubric",), value: str = "score",
+              confidence: float = 0.95) -> pd.DataFrame:
+    """
+    Grouped means of scored rows with Hoeffding intervals over the rubric bounds. Frames from
+    `eval_frame` also get Serfling intervals, which treat a group as one sample without
+    replacement from the lists its items were sampled from, NaN for groups with unsampled items.
+    """
+    data = frame[frame[value].notna()]
+    bounded = value == "normalized"
+    groups = _groups(data, by)
+    result = groups.agg(n=(value, "size"), mean=(value, "mean"), std=(value, "std"),
+                        ge=("ge", "min"), le=("le", "max"))
+    if bounded:
+        result["ge"], result["le"] = 0.0, 1.0
+    n = result["n"].to_numpy()
+    result["hoeffding"] = utils.calc_hoeffding_error(
+        n, result["le"].to_numpy(), result["ge"].to_numpy(), confidence)
+    if "population" in data.columns:
+        keys = ["instance", "path", *by]
+        populations = _groups(data.drop_duplicates(keys), by)[
+            "population"].sum(min_count=1)
+        unsampled = _groups(data.assign(unsampled=data["population"].isna()), by)[
+            "unsampled"].any()
+        populations[unsampled] = np.nan
+        result["population"] = populations
+        result["serfling"] = utils.calc_serfling_error(
+            n, populations.to_numpy(), result["le"].to_numpy(), result["ge"].to_numpy(), confidence)
+    return result
+
+
+def bootstrap(frame: pd.DataFrame, by: Sequence[str] = ("rubric",), value: str = "score",
+              confidence: float = 0.95, resamples: int = 2000, rng: Optional[np.random.Generator] = None,
+              max_levels: int = 64, chunk_elements: int = 2**24) -> pd.DataFrame:
+    """
+    Percentile bootstrap intervals of the grouped means of scored rows. Scores on a rubric scale
+    take few distinct values, so resampling a group is a multinomial draw of its level counts and
+    every group is resampled at once, in chunks of `resamples` that keep the draws under
+    `chunk_elements`. With more than `max_levels` distinct values each group resamples its rows.
+    """
+    rng = rng or np.random.default_rng(42)
+    data = frame[frame[value].notna()]
+    groups = _groups(data, by)
+    codes = groups.ngroup().to_numpy()
+    values = data[value].to_numpy(dtype=float)
+    sizes = groups.size()
+    n = sizes.to_numpy()
+    means = np.empty((resamples, len(n)))
+    levels, level_codes = np.unique(values, return_inverse=True)
+
+    if len(levels) <= max_levels:
+        counts = np.bincount(codes * len(levels) + level_codes,
+                             minlength=len(n) * len(levels)).reshape(len(n), len(levels))
+        pvals = counts / n[:, None]
+        step = max(1, chunk_elements // max(1, counts.size))
+        for start in range(0, resamples, step):
+            size = min(step, resamples - start)
+            draws = rng.multinomial(n, pvals, size=(size, len(n)))
+            means[start:start + size] = draws @ levels / n
+    else:
+        order = np.argsort(codes, kind="stable")
+        for g, rows in enumerate(np.split(values[order], np.cumsum(n)[:-1])):
+            step = max(1, chunk_elements // len(rows))
+            for start in range(0, resamples, step):
+                size = min(step, resamples - start)
+                means[start:start + size, g] = rows[rng.integers(
+                    0, len(rows), size=(size, len(rows)))].mean(axis=1)
+
+    alpha = (1 - confidence) / 2
+    lower, upper = np.quantile(means, [alpha, 1 - alpha], axis=0)
+    return pd.DataFrame({"n": n, "mean": groups[value].mean().to_numpy(), "lower": lower, "upper": upper},
+                        index=sizes.index)
+
+
+def _pearson(data: pd.DataFrame, x: str, y: str, by: Sequence[str]) -> pd.Series:
+    groups = _groups(data, by)
+    dx = data[x] - groups[x].transform("mean")
+    dy = data[y] - groups[y].transform("mean")
+    sums = _groups(pd.DataFrame({"xy": dx * dy, "xx": dx * dx, "yy": dy * dy}).join(
+        data[list(by)]), by)[["xy", "xx", "yy"]].sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return sums["xy"] / np.sqrt(sums["xx"] * sums["yy"])
+
+
+def noise_correlation(frame: pd.DataFrame, by: Sequence[str] = (), value: str = "normalized") -> pd.DataFrame:
+    """
+    Pearson and Spearman correlations of contrastive scores with their noise factor per group, a
+    grader that tracks the injected noise shows a strongly negative correlation.
+    """
+    data = frame[frame[value].notna() & frame["noise_factor"].notna()]
+    data = data[[*by, value, "noise_factor"]].copy()
+    groups = _groups(data, by)
+    ranks = pd.DataFrame({"noise_rank": groups["noise_factor"].rank(),
+                          "score_rank": groups[value].rank()}).join(data[list(by)])
+    return pd.DataFrame({
+        "n": groups.size(),
+        "pearson": _pearson(data, "noise_factor", value, by),
+        "spearman": _pearson(ranks, "noise_rank", "score_rank", by),
+    })
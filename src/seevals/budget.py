@@ -0,0 +1,208 @@
+import threading
+from typing import Any, Dict, Mapping, Optional, Tuple
+import pydantic
+import pydantic_core
+
+
+class ModelPrice(pydantic.BaseModel):
+    input: float = pydantic.Field(
+        description="USD per million prompt tokens", ge=0.0)
+    output: float = pydantic.Field(
+        default=0.0, description="USD per million completion tokens", ge=0.0)
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.input + completion_tokens * self.output) / 1_000_000
+
+
+# keyed by the model_name of config.yaml, a provider prefix such as "openai/" is ignored on lookup
+PRICES: Dict[str, ModelPrice] = {
+    "llama4-maverick": ModelPrice(input=0.27, output=0.85),
+    # the scout alias is routed to the Maverick deployment in config.yaml so it is billed as Maverick
+    "llama4-scout": ModelPrice(input=0.27, output=0.85),
+    "bedrock-haiku": ModelPrice(input=0.80, output=4.00),
+    "bedrock-sonnet": ModelPrice(input=3.00, output=15.00),
+    "bedrock-sonnet-372": ModelPrice(input=3.00, output=15.00),
+    "bedrock-sonnet-37": ModelPrice(input=3.00, output=15.00),
+    "bedrock-cohere": ModelPrice(input=0.10),
+}
+
+
+def model_price(model: str, prices: Mapping[str, ModelPrice] = PRICES) -> Optional[ModelPrice]:
+    return prices.get(model, prices.get(model.split("/")[-1]))
+
+
+def rubric_label(args: Any) -> str:
+    """The rubrics a call grades against, taken from the criteria of a grading or contrastive input."""
+    criteria = args.get("criteria") if isinstance(args, Mapping) else None
+    if criteria is None:
+        return "-"
+    return " | ".join(rubric.desc for rubric in criteria.rubrics)
+
+
+class Spend(pydantic.BaseModel):
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cost: float, calls: int = 1):
+        self.calls += calls
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+
+
+class BudgetReport(pydantic.BaseModel):
+    total: Spend
+    by_module: Dict[str, Spend]
+    by_rubric: Dict[str, Spend]
+    skipped: int = pydantic.Field(
+        description="The number of calls not dispatched because the budget stopped the run")
+    stopped: Optional[str] = pydantic.Field(
+        default=None, description="Why the budget stopped the run, if it did")
+
+
+class Reservation(pydantic.BaseModel):
+    raw_tokens: int
+    tokens: int
+    cost: float
+
+
+class Budget:
+    """
+    Token and cost caps for `run_parallel`. Before each call the prompt tokens are estimated from the
+    serialised input, calibrated by the actual usage of completed calls, and the call is only dispatched
+    while the spend plus in-flight reservations stays under the caps. With `projected_overrun` the run
+    also stops once the average cost of completed calls projects the whole run past
+    `max_cost * projected_overrun`. Skipped calls return None, completed results are kept. Calls are
+    priced by the model they are admitted for, so one budget can be shared by runs with different LMs.
+    Every attempt of a hedged call is reserved and recorded as a call of its own.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None,
+                 projected_overrun: Optional[float] = None, min_calls_for_projection: int = 10,
+                 completion_tokens_estimate: int = 512, prices: Mapping[str, ModelPrice] = PRICES):
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.projected_overrun = projected_overrun
+        self.min_calls_for_projection = min_calls_for_projection
+        self.completion_tokens_estimate = completion_tokens_estimate
+        self.prices = prices
+        self.total = Spend()
+        self.by_module: Dict[str, Spend] = {}
+        self.by_rubric: Dict[str, Spend] = {}
+        self.skipped = 0
+        self.stopped: Optional[str] = None
+        self._reserved_tokens = 0
+        self._reserved_cost = 0.0
+        self._recorded_raw_tokens = 0
+        self._expected_calls = 0
+        self._lock = threading.Lock()
+
+    def start(self, model: str, expected_calls: int):
+        price = model_price(model, self.prices)
+        if price is None and self.max_cost is not None:
+            raise ValueError(
+                f"No price for model {model}, add it to the prices to enforce a cost cap")
+        with self._lock:
+            self._expected_calls += expected_calls
+
+    def estimate(self, args: Any) -> Tuple[int, int, int]:
+        """
+        (raw, prompt, completion) tokens of a call. The raw estimate is ~4 characters per token of the
+        serialised input, the prompt estimate scales it by the prompt/raw ratio of the recorded calls
+        to account for instructions and schemas.
+        """
+        raw = len(pydantic_core.to_json(args, fallback=str)) // 4 + 1
+        with self._lock:
+            if self.total.calls:
+                ratio = self.total.prompt_tokens / max(self._recorded_raw_tokens, 1)
+                completion = self.total.completion_tokens // self.total.calls
+            else:
+                ratio, completion = 1.0, self.completion_tokens_estimate
+        return raw, int(raw * ratio), completion
+
+    def _reservation(self, args: Any, model: str) -> Reservation:
+        raw_tokens, prompt_tokens, completion_tokens = self.estimate(args)
+        price = model_price(model, self.prices)
+        cost = price.cost(prompt_tokens, completion_tokens) if price else 0.0
+        return Reservation(raw_tokens=raw_tokens, tokens=prompt_tokens + completion_tokens, cost=cost)
+
+    def admit(self, args: Any, model: str) -> Optional[Reservation]:
+        reservation = self._reservation(args, model)
+        with self._lock:
+            if self.stopped is None:
+                self.stopped = self._check(reservation.tokens, reservation.cost)
+            if self.stopped is not None:
+                self.skipped += 1
+                return None
+            self._reserved_tokens += reservation.tokens
+            self._reserved_cost += reservation.cost
+        return reservation
+
+    def admit_extra(self, args: Any, model: str) -> Optional[Reservation]:
+        """
+        Reserve an extra attempt of an admitted call, such as a hedge. An attempt that does not fit
+        under the caps is refused without stopping the run or counting as skipped.
+        """
+        reservation = self._reservation(args, model)
+        with self._lock:
+            if self.stopped is not None or self._check(reservation.tokens, reservation.cost) is not None:
+                return None
+            self._reserved_tokens += reservation.tokens
+            self._reserved_cost += reservation.cost
+        return reservation
+
+    def _check(self, tokens: int, cost: float) -> Optional[str]:
+        if self.max_tokens is not None and self.total.total_tokens + self._reserved_tokens + tokens > self.max_tokens:
+            return f"token cap of {self.max_tokens} reached"
+        if self.max_cost is not None and self.total.cost + self._reserved_cost + cost > self.max_cost:
+            return f"cost cap of ${self.max_cost} reached"
+        if (self.projected_overrun is not None and self.max_cost is not None
+                and self.total.calls >= self.min_calls_for_projection):
+            projected = self.total.cost / self.total.calls * self._expected_calls
+            if projected > self.max_cost * self.projected_overrun:
+                return f"projected cost ${projected:.2f} exceeds {self.projected_overrun}x the cost cap of ${self.max_cost}"
+        return None
+
+    def release(self, reservation: Reservation):
+        with self._lock:
+            self._reserved_tokens -= reservation.tokens
+            self._reserved_cost -= reservation.cost
+
+    def record(self, reservation: Reservation, module: str, args: Any, usage: Optional[Dict[str, Dict[str, Any]]]):
+        """
+        Replace the reservation of a finished call by its actual usage, keyed by model as dspy reports
+        it. A call that failed after an LM answered is recorded with the usage it had.
+        """
+        prompt_tokens = completion_tokens = 0
+        cost = 0.0
+        for model, model_usage in (usage or {}).items():
+            model_prompt = model_usage.get("prompt_tokens") or 0
+            model_completion = model_usage.get("completion_tokens") or 0
+            price = model_price(model, self.prices)
+            prompt_tokens += model_prompt
+            completion_tokens += model_completion
+            cost += price.cost(model_prompt, model_completion) if price else 0.0
+        rubric = rubric_label(args)
+        with self._lock:
+            self._reserved_tokens -= reservation.tokens
+            self._reserved_cost -= reservation.cost
+            self._recorded_raw_tokens += reservation.raw_tokens
+            for spend in (self.total,
+                          self.by_module.setdefault(module, Spend()),
+                          self.by_rubric.setdefault(rubric, Spend())):
+                spend.add(prompt_tokens, completion_tokens, cost)
+
+    def report(self) -> BudgetReport:
+        with self._lock:
+            return BudgetReport(
+                total=self.total.model_copy(),
+                by_module={name: spend.model_copy() for name, spend in self.by_module.items()},
+                by_rubric={name: spend.model_copy() for name, spend in self.by_rubric.items()},
+                skipped=self.skipped,
+                stopped=self.stopped)
@@ -2,7 +2,7 @@ import random
 import pydantic
 import json
 import dspy
-from typing import TypedDict, Type, Tuple, Dict, Iterable, ParamSpec, TypeVar, Generic, List, Callable, Optional, Protocol
+from typing import Any, TypedDict, Type, Tuple, Dict, Iterable, ParamSpec, TypeVar, Generic, List, Callable, Optional, Protocol
 from .path_utils import path_exists_in_model
 import jsonpath_ng as jp
 
@@ -87,6 +87,13 @@ class View(pydantic.BaseModel):
     views: List[str]
 
 
+class ViewProjection(pydantic.BaseModel):
+    item: Optional[Any] = pydantic.Field(
+        default=None, description="The sampled value being graded")
+    view: Dict[str, Any] = pydantic.Field(
+        default={}, description="The context resolved from the view paths, keyed by path")
+
+
 class EvalItem(pydantic.BaseModel, Generic[T]):
     id: str
     sample: Optional[Sample]
@@ -136,7 +143,7 @@ class EvalConfig(pydantic.BaseModel):
         value = ""
         dataset = []
         count = 0
-        for instance in instances[0:2]:
+        for instance in instances:
             data: EvalData[Z] = []
             try:
                 instance_data = instance.model_dump()
@@ -0,0 +1,154 @@
+import zlib
+from typing import Any, Dict, List, Sequence, Set, Tuple, TypeVar
+import numpy as np
+import pydantic
+from . import data_types as types
+from .path_utils import resolve_view
+
+T = TypeVar('T')
+
+# Multiply-shift hashing of the 32-bit shingle hashes, ((a * h + b) mod 2^64) >> 32 is a
+# universal family without the modulo of a prime that dominates the cost of MinHash
+SHIFT = np.uint64(32)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingle(text: str, size: int = 5) -> Set[str]:
+    """Word level shingles of a text, a text shorter than `size` words is a single shingle."""
+    tokens = text.lower().split()
+    if len(tokens) <= size:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def extract_text(instance: pydantic.BaseModel, paths: List[str]) -> str:
+    """Join every string and number found under the JSONPath `paths` of an instance into one text."""
+    view = resolve_view(instance.model_dump(), paths)
+    return " ".join(_flatten_text(view[path]) for path in paths)
+
+
+def _flatten_text(value: Any) -> str:
+    if isinstance(value, dict):
+        return " ".join(_flatten_text(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(_flatten_text(v) for v in value)
+    if value is None:
+        return ""
+    return str(value)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, seed: int = 42):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingles: Set[str]) -> np.ndarray:
+        if not shingles:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        return self._permute(hashes).min(axis=0)
+
+    def _permute(self, hashes: np.ndarray) -> np.ndarray:
+        # uint64 wraparound is the mod 2^64 of the hash family
+        return (hashes[:, None] * self.a + self.b) >> SHIFT
+
+    def signatures(self, texts: Sequence[str], shingle_size: int = 5) -> np.ndarray:
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.uint64)
+        for i, text in enumerate(texts):
+            signatures[i] = self.signature(shingle(text, shingle_size))
+        return signatures
+
+
+def lsh_params(threshold: float, num_perm: int, false_negative_weight: float = 0.95) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows <= num_perm minimising the weighted areas under the
+    false positive probability below `threshold` and the false negative probability above it, as
+    datasketch does. Candidates are verified afterwards, so false negatives are weighted far above
+    false positives, which puts the S-curve's midpoint (1/bands)^(1/rows) well below `threshold`.
+    """
+    pairs = [(bands, rows) for bands in range(1, num_perm + 1)
+             for rows in range(1, num_perm // bands + 1)]
+    bands = np.array([b for b, _ in pairs], dtype=float)[:, None]
+    rows = np.array([r for _, r in pairs], dtype=float)[:, None]
+    below = np.linspace(0.0, threshold, 201)
+    above = np.linspace(threshold, 1.0, 201)
+    # a pair with Jaccard similarity s shares a bucket with probability 1 - (1 - s^rows)^bands
+    false_positive = np.trapezoid(1 - (1 - below ** rows) ** bands, below, axis=1)
+    false_negative = np.trapezoid((1 - above ** rows) ** bands, above, axis=1)
+    error = (1 - false_negative_weight) * false_positive + false_negative_weight * false_negative
+    return pairs[int(np.argmin(error))]
+
+
+class DedupResult(pydantic.BaseModel):
+    assignment: List[int] = pydantic.Field(
+        description="The index of the representative of each item, a representative points to itself")
+
+    @property
+    def representatives(self) -> List[int]:
+        return [i for i, rep in enumerate(self.assignment) if i == rep]
+
+    def clusters(self) -> Dict[int, List[int]]:
+        clusters: Dict[int, List[int]] = {}
+        for i, rep in enumerate(self.assignment):
+            clusters.setdefault(rep, []).append(i)
+        return clusters
+
+    def select(self, items: Sequence[T]) -> List[T]:
+        """The representative items, in the order `expand` expects their responses."""
+        return [items[i] for i in self.representatives]
+
+    def expand(self, response: types.ResponseData[types.R]) -> types.ResponseData[types.R]:
+        """Propagate the responses of the representatives to every member of their cluster."""
+        position = {rep: i for i, rep in enumerate(self.representatives)}
+        if len(position) != len(response.data):
+            raise ValueError(
+                f"Expected {len(position)} responses but got {len(response.data)}")
+        return types.ResponseData(
+            data=[response.data[position[rep]] for rep in self.assignment],
+            debug=[response.debug[position[rep]] for rep in self.assignment])
+
+
+def find_near_duplicates(texts: Sequence[str], threshold: float = 0.9, num_perm: int = 128,
+                         shingle_size: int = 5, seed: int = 42) -> DedupResult:
+    """
+    Cluster near-duplicate texts with MinHash/LSH. Texts are visited in order, each text joins the
+    first earlier representative sharing an LSH bucket whose estimated Jaccard similarity is at
+    least `threshold`, otherwise it becomes a representative itself.
+    """
+    signatures = MinHasher(num_perm, seed).signatures(texts, shingle_size)
+    bands, rows = lsh_params(threshold, num_perm)
+    # bucket id of every text in every band, hashing the band as raw bytes
+    band_keys = []
+    for band in range(bands):
+        chunk = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = chunk.view(np.dtype((np.void, rows * chunk.itemsize))).ravel()
+        band_keys.append(np.unique(keys, return_inverse=True)[1].ravel())
+    band_keys = np.stack(band_keys, axis=1) if bands else np.empty((len(texts), 0), dtype=int)
+
+    buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+    assignment = list(range(len(texts)))
+    for i in range(len(texts)):
+        checked = set()
+        for band, key in enumerate(band_keys[i]):
+            for rep in buckets[band].get(key, ()):
+                if rep in checked:
+                    continue
+                checked.add(rep)
+                if np.mean(signatures[rep] == signatures[i]) >= threshold:
+                    assignment[i] = rep
+                    break
+            if assignment[i] != i:
+                break
+        if assignment[i] == i:
+            for band, key in enumerate(band_keys[i]):
+                buckets[band].setdefault(key, []).append(i)
+    return DedupResult(assignment=assignment)
+
+
+def dedup_results(results: Sequence[pydantic.BaseModel], paths: List[str], threshold: float = 0.9,
+                  num_perm: int = 128, shingle_size: int = 5, seed: int = 42) -> DedupResult:
+    texts = [extract_text(result, paths) for result in results]
+    return find_near_duplicates(texts, threshold, num_perm, shingle_size, seed)
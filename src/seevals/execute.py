@@ -1,25 +1,95 @@
 import dspy
+from dspy.utils.usage_tracker import UsageTracker
 from typing import TypedDict, Type, Tuple, Dict, Iterable, ParamSpec, TypeVar, Generic, List, Callable, Optional, Protocol
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from . import data_types as types
+from .budget import Budget, Reservation
+from .scheduler import Job
+from .hedging import HedgePolicy
 
 
 def run_parallel(module: types.ForwardModule[types.T, types.R],
                  args_list: List[types.T],
                  lm: dspy.LM,
-                 concurrency: int) -> types.ResponseData[types.R]:
-    def executor(args: types.T):
-        with dspy.context(lm=lm):
+                 concurrency: int,
+                 budget: Optional[Budget] = None,
+                 job: Optional[Job] = None,
+                 hedge: Optional[HedgePolicy] = None) -> types.ResponseData[types.R]:
+    def call(args: types.T, lm: dspy.LM, context: Dict):
+        with dspy.context(lm=lm, **context):
             result = module(args)
             return module.get_value(result), result
 
-    with ThreadPoolExecutor(max_workers=concurrency) as ex:
-        futures = {ex.submit(executor, args): i for i,
-                   args in enumerate(args_list)}
-        results: List[types.R | None] = [None] * len(args_list)
-        preds: List[dspy.Prediction | None] = [None] * len(args_list)
-        # thread-safe because they write to different areas of memory
-        for fut in as_completed(futures):
-            idx = futures[fut]
-            results[idx], preds[idx] = fut.result()
+    def scheduled_call(args: types.T, lm: dspy.LM, context: Dict):
+        if job is None:
+            return call(args, lm, context)
+        with job.slot():
+            return call(args, lm, context)
+
+    def hedged_call(attempt: Callable[[dspy.LM], Tuple], reserve=None, release=None):
+        if hedge is None:
+            return attempt(lm)
+        return hedge.run(attempt, lm, hedge_pool, reserve, release)
+
+    def budgeted_call(args: types.T, lm: dspy.LM, reservations: List[Reservation]):
+        # each attempt claims one reservation of its call, list.pop and list.append are atomic
+        reservation = reservations.pop()
+        tracker = UsageTracker()
+        try:
+            value, result = scheduled_call(args, lm, dict(usage_tracker=tracker))
+        except Exception:
+            usage = tracker.get_total_tokens()
+            if usage:
+                budget.record(reservation, type(module).__name__, args, usage)
+            else:
+                budget.release(reservation)
+            raise
+        usage = tracker.get_total_tokens()
+        result.set_lm_usage(usage)
+        budget.record(reservation, type(module).__name__, args, usage)
+        return value, result
+
+    def executor(args: types.T):
+        if budget is None:
+            return hedged_call(lambda attempt_lm: scheduled_call(args, attempt_lm, {}))
+        reservation = budget.admit(args, lm.model)
+        if reservation is None:
+            return None, None
+        reservations = [reservation]
+
+        # a hedge is only sent when its own reservation fits, the ignored attempt is recorded
+        # when it finishes
+        def reserve(hedge_lm: dspy.LM) -> bool:
+            extra = budget.admit_extra(args, hedge_lm.model)
+            if extra is not None:
+                reservations.append(extra)
+            return extra is not None
+
+        def release():
+            budget.release(reservations.pop())
+
+        return hedged_call(lambda attempt_lm: budgeted_call(args, attempt_lm, reservations), reserve, release)
+
+    if budget is not None:
+        budget.start(lm.model, len(args_list))
+        if hedge is not None and hedge.lm is not None:
+            budget.start(hedge.lm.model, 0)
+
+    # hedged calls run on their own pool so a worker can wait on both attempts, ignored
+    # attempts must not hold up the end of the run
+    hedge_pool = ThreadPoolExecutor(
+        max_workers=2 * concurrency) if hedge is not None else None
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as ex:
+            futures = {ex.submit(executor, args): i for i,
+                       args in enumerate(args_list)}
+            results: List[types.R | None] = [None] * len(args_list)
+            preds: List[dspy.Prediction | None] = [None] * len(args_list)
+            # thread-safe because they write to different areas of memory
+            for fut in as_completed(futures):
+                idx = futures[fut]
+                results[idx], preds[idx] = fut.result()
+    finally:
+        if hedge_pool is not None:
+            hedge_pool.shutdown(wait=False, cancel_futures=True)
     return types.ResponseData(data=results, debug=preds)
@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+import dspy
+import numpy as np
+import pydantic
+
+# samples a latency in seconds
+Latency = Callable[[np.random.Generator], float]
+Answer = Dict[str, Any] | Callable[[List[Dict[str, Any]]], Dict[str, Any]]
+
+
+def constant_latency(seconds: float) -> Latency:
+    return lambda rng: seconds
+
+
+def lognormal_latency(median: float, sigma: float = 0.5) -> Latency:
+    """Provider latencies are long tailed, a lognormal with the given median is a fair stand-in."""
+    return lambda rng: float(rng.lognormal(np.log(median), sigma)) if median > 0 else 0.0
+
+
+class FakeLMError(RuntimeError):
+    ...
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text
+    return max(1, len(text) // 4)
+
+
+def format_answer(answer: Dict[str, Any]) -> str:
+    """Render output field values the way the ChatAdapter expects to parse them."""
+    sections = []
+    for name, value in answer.items():
+        if isinstance(value, pydantic.BaseModel):
+            value = value.model_dump_json()
+        elif not isinstance(value, str):
+            value = json.dumps(value)
+        sections.append(f"[[ ## {name} ## ]]\n{value}")
+    sections.append("[[ ## completed ## ]]")
+    return "\n\n".join(sections)
+
+
+# dspy.LM records its own usage in dspy 3.0, later versions record it in BaseLM for every LM
+_BASE_RECORDS_USAGE = hasattr(dspy.BaseLM, "_record_response")
+
+
+class FakeLM(dspy.BaseLM):
+    """
+    A local stand-in for dspy.LM, answers every prompt with `answer` after a sampled latency and fails
+    with probability `error_rate`. Token usage is estimated from the prompt and answer unless
+    `completion_tokens` is given, so runs behave like a provider without network or cost.
+    """
+
+    def __init__(self, answer: Answer, latency: Latency | float = 0.0, error_rate: float = 0.0,
+                 completion_tokens: Optional[int] = None, model: str = "fake", seed: int = 42):
+        super().__init__(model=model, model_type="chat",
+                         temperature=0.0, max_tokens=1000, cache=False)
+        self.answer = answer
+        self.latency = latency if callable(latency) else constant_latency(latency)
+        self.error_rate = error_rate
+        self.completion_tokens = completion_tokens
+        self.rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def forward(self, prompt: Optional[str] = None, messages: Optional[List[Dict[str, Any]]] = None, **kwargs):
+        messages = messages or [{"role": "user", "content": prompt or ""}]
+        # numpy generators are not thread-safe
+        with self._lock:
+            self.calls += 1
+            delay = self.latency(self.rng)
+            failed = self.rng.random() < self.error_rate
+            self.errors += int(failed)
+        time.sleep(delay)
+        if failed:
+            raise FakeLMError(f"Simulated failure of {self.model}")
+
+        answer = self.answer(messages) if callable(self.answer) else self.answer
+        content = format_answer(answer)
+        prompt_tokens = sum(estimate_tokens(str(message.get("content", "")))
+                            for message in messages)
+        completion_tokens = self.completion_tokens or estimate_tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if not _BASE_RECORDS_USAGE and dspy.settings.usage_tracker:
+            dspy.settings.usage_tracker.add_usage(self.model, dict(usage))
+        return SimpleNamespace(
+            model=self.model,
+            choices=[SimpleNamespace(
+                message=SimpleNamespace(content=content, tool_calls=None),
+                finish_reason="stop",
+                logprobs=None)],
+            usage=usage)
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Optional, TypeVar
+import numpy as np
+import pydantic
+
+R = TypeVar('R')
+
+
+class HedgeStats(pydantic.BaseModel):
+    calls: int
+    hedges: int
+    backup_wins: int
+    threshold: Optional[float] = pydantic.Field(
+        description="The current latency in seconds after which a call is hedged")
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedges / self.calls if self.calls else 0.0
+
+
+class HedgePolicy:
+    """
+    Hedges slow calls of `run_parallel`. Once a call runs longer than the `percentile` of the call
+    latencies seen so far in the run, a duplicate is sent, to `lm` when given so it can go to
+    another deployment, and whichever finishes first wins. The loser is cancelled if it has not
+    started and ignored otherwise. At most `max_fraction` of the calls are hedged so the extra
+    cost stays bounded, and nothing is hedged before `min_samples` latencies are known. With a
+    Budget the hedge is only sent if it fits under the caps, and the ignored call is recorded once
+    it finishes.
+    """
+
+    def __init__(self, percentile: float = 95.0, max_fraction: float = 0.05, min_samples: int = 20,
+                 lm: Optional[Any] = None, window: int = 1000):
+        self.percentile = percentile
+        self.max_fraction = max_fraction
+        self.min_samples = min_samples
+        self.lm = lm
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedges = 0
+        self.backup_wins = 0
+
+    def threshold(self) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            return float(np.percentile(self._latencies, self.percentile))
+
+    def observe(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.max_fraction * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def _start(self, pool: Executor, attempt: Callable[[Any], R], lm: Any,
+               release: Optional[Callable[[], None]]) -> Future:
+        start = time.monotonic()
+        future = pool.submit(attempt, lm)
+
+        # latencies are learned from every finished call, including ignored ones
+        def observe(done: Future):
+            if done.cancelled():
+                # also when the pool is shut down at the end of the run
+                if release is not None:
+                    release()
+            elif done.exception() is None:
+                self.observe(time.monotonic() - start)
+        future.add_done_callback(observe)
+        return future
+
+    def run(self, attempt: Callable[[Any], R], lm: Any, pool: Executor,
+            reserve: Optional[Callable[[Any], bool]] = None,
+            release: Optional[Callable[[], None]] = None) -> R:
+        """
+        Run `attempt(lm)` on `pool`, hedging it with `attempt(self.lm or lm)` when it is slow.
+        `reserve(lm)` is asked before a hedge is sent and can refuse it, `release()` is called for
+        every attempt that is cancelled before it started.
+        """
+        with self._lock:
+            self.calls += 1
+        primary = self._start(pool, attempt, lm, release)
+        threshold = self.threshold()
+        if threshold is None:
+            return primary.result()
+        done, _ = wait([primary], timeout=threshold)
+        backup_lm = self.lm or lm
+        if done or not self._take_hedge():
+            return primary.result()
+        if reserve is not None and not reserve(backup_lm):
+            with self._lock:
+                self.hedges -= 1
+            return primary.result()
+
+        backup = self._start(pool, attempt, backup_lm, release)
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is backup:
+                        with self._lock:
+                            self.backup_wins += 1
+                    return future.result()
+        # both failed, surface the error of the original call
+        return primary.result()
+
+    def stats(self) -> HedgeStats:
+        threshold = self.threshold()
+        with self._lock:
+            return HedgeStats(calls=self.calls, hedges=self.hedges,
+                              backup_wins=self.backup_wins, threshold=threshold)
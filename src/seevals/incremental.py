@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+from typing import Dict, List
+import dspy
+from . import data_types as types
+from .agent_util import iter_eval_items
+from .path_utils import resolve_view
+
+
+def fingerprint(eval_data: types.EvalData, datum: types.EvalDatum, item: types.EvalItem, namespace: str = "") -> str:
+    """
+    Hash everything a grade of an eval item depends on: the graded slice of the instance (the item's
+    data and its resolved view), the item path, sample params, view paths and rubric. `namespace`
+    separates grades that should not be shared, e.g. of different grader models.
+    """
+    unit = {
+        "namespace": namespace,
+        "data": item.data,
+        "view_data": resolve_view(eval_data.raw_data, item.view.views),
+        "path": item.id,
+        "sample": item.sample.model_dump() if item.sample is not None else None,
+        "view": item.view.views,
+        "rubric": datum.rubric.model_dump(),
+    }
+    encoded = json.dumps(unit, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def grader_namespace(module: dspy.Module, lm: dspy.LM) -> str:
+    """
+    A namespace for the grades of `module` run with `lm`, it changes with the model and with the
+    instructions or fields of any predictor of the module, so a changed prompt is graded again.
+    """
+    prompt = [(name, predictor.signature.instructions,
+               {field: (str(info.annotation), info.json_schema_extra)
+                for field, info in predictor.signature.fields.items()})
+              for name, predictor in module.named_predictors()]
+    encoded = json.dumps(prompt, sort_keys=True, default=str)
+    return f"{lm.model}:{hashlib.sha256(encoded.encode()).hexdigest()[:16]}"
+
+
+class GradeManifest:
+    """
+    An append-only JSONL manifest of the grades of eval items keyed by their fingerprint. `apply`
+    restores the grades of unchanged items, so only items whose instance slice, path, sample,
+    view or rubric changed are left to grade, and `record` adds the new grades.
+
+        manifest = GradeManifest(path, namespace=grader_namespace(grader, lm))
+        manifest.apply(dataset)
+        inputs = agent_util.make_view_grading_inputs(dataset, skip_scored=True)
+        grades = run_parallel(grader, inputs, lm, 20)
+        agent_util.apply_view_scores(dataset, grades, skip_scored=True)
+        manifest.record(dataset)
+    """
+
+    def __init__(self, path: str, namespace: str = ""):
+        self.path = path
+        self.namespace = namespace
+        self.scores: Dict[str, float] = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.scores[entry['fingerprint']] = entry['score']
+
+    def fingerprints(self, eval_dataset: List[types.EvalData]) -> List[str]:
+        return [fingerprint(eval_data, datum, item, self.namespace)
+                for eval_data, datum, item in iter_eval_items(eval_dataset)]
+
+    def apply(self, eval_dataset: List[types.EvalData]) -> int:
+        """Fill in the scores of unscored items graded before, returns how many were reused."""
+        reused = 0
+        for (_, _, item), key in zip(iter_eval_items(eval_dataset), self.fingerprints(eval_dataset)):
+            if item.score is None and key in self.scores:
+                item.score = self.scores[key]
+                reused += 1
+        return reused
+
+    def record(self, eval_dataset: List[types.EvalData]) -> int:
+        """Append the scores of items not in the manifest yet, returns how many were added."""
+        added = 0
+        with open(self.path, 'a') as f:
+            for (_, _, item), key in zip(iter_eval_items(eval_dataset), self.fingerprints(eval_dataset)):
+                if item.score is None or self.scores.get(key) == item.score:
+                    continue
+                self.scores[key] = item.score
+                f.write(json.dumps({'fingerprint': key, 'id': item.id, 'score': item.score}) + '\n')
+                added += 1
+        return added
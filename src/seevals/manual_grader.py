@@ -0,0 +1,143 @@
+"""
+Export an eval dataset for manual grading as a static site that works offline from the file
+system. Items are written in pages of data files that the viewer loads on demand, so graders can
+work through very large datasets with steady memory use. Scores are kept in the browser keyed by
+the item's position, and exported as JSONL with the dataset id, which `import_manual_scores`
+writes back into `EvalItem.score`.
+
+    manual_grader.export_manual_grader(eval_dataset, "./manual")
+    # open ./manual/index.html, grade, then "Export scores"
+    manual_grader.import_manual_scores(eval_dataset, "./manual_scores.jsonl")
+"""
+import hashlib
+import json
+import os
+import shutil
+from importlib import resources
+from typing import Any, Dict, Iterator, List, Tuple
+from . import data_types as types
+from .path_utils import resolve_view
+
+PAGE_CALLBACK = "__seevalsPage"
+MANIFEST_CALLBACK = "__seevalsManifest"
+
+
+def score_key(entry_index: int, datum: types.EvalDatum, item: types.EvalItem) -> str:
+    # the same "entryIndex_groupId_itemId" keys as the evaluator.js viewer
+    return f"{entry_index}_{datum.group_id}_{item.id}"
+
+
+def _page_path(page: int) -> str:
+    return os.path.join("pages", f"page-{page:05d}.js")
+
+
+def _records(eval_dataset: List[types.EvalData]) -> Iterator[Tuple[types.EvalItem, Dict[str, Any], Dict[str, Any]]]:
+    """(item, rubric, record) of every eval item in export order, the record is what the viewer shows."""
+    for entry_index, eval_data in enumerate(eval_dataset):
+        views: Dict[tuple, Dict[str, Any]] = {}
+        for datum in eval_data.data:
+            rubric = datum.rubric.model_dump()
+            for item in datum.items:
+                paths = tuple(item.view.views)
+                if paths not in views:
+                    views[paths] = resolve_view(eval_data.raw_data, item.view.views)
+                yield item, rubric, {
+                    "key": score_key(entry_index, datum, item),
+                    "entry": entry_index,
+                    "group_id": datum.group_id,
+                    "item_id": item.id,
+                    "sample": item.sample.num_samples if item.sample is not None else None,
+                    "data": item.data,
+                    "view": views[paths],
+                }
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def dataset_id(eval_dataset: List[types.EvalData]) -> str:
+    """The id of an export, it changes with any item or rubric but not with the scores."""
+    digest = hashlib.sha256()
+    for _, rubric, record in _records(eval_dataset):
+        digest.update(_encode([rubric, record]).encode())
+    return digest.hexdigest()[:16]
+
+
+def export_manual_grader(eval_dataset: List[types.EvalData], directory: str, page_size: int = 200,
+                         title: str = "Manual grading") -> str:
+    """
+    Write `index.html`, `manifest.js` and the data pages of `page_size` items to `directory`,
+    returns the path of `index.html`. The view of every item is resolved here so the viewer never
+    needs the raw data of an instance.
+    """
+    os.makedirs(os.path.join(directory, "pages"), exist_ok=True)
+    rubrics: Dict[str, int] = {}
+    records: List[Dict[str, Any]] = []
+    digest = hashlib.sha256()
+    pages = 0
+    total = 0
+
+    def flush():
+        nonlocal pages
+        with open(os.path.join(directory, _page_path(pages)), "w", encoding="utf-8") as f:
+            f.write(f"window.{PAGE_CALLBACK}({pages},{_encode(records)});\n")
+        records.clear()
+        pages += 1
+
+    for _, rubric, record in _records(eval_dataset):
+        digest.update(_encode([rubric, record]).encode())
+        records.append({**record, "rubric": rubrics.setdefault(_encode(rubric), len(rubrics))})
+        total += 1
+        if len(records) == page_size:
+            flush()
+    if records:
+        flush()
+
+    manifest = {
+        "title": title,
+        "dataset_id": digest.hexdigest()[:16],
+        "total": total,
+        "page_size": page_size,
+        "pages": pages,
+        "rubrics": [json.loads(rubric) for rubric in rubrics],
+    }
+    with open(os.path.join(directory, "manifest.js"), "w", encoding="utf-8") as f:
+        f.write(f"window.{MANIFEST_CALLBACK} = {json.dumps(manifest, ensure_ascii=False)};\n")
+    index = os.path.join(directory, "index.html")
+    with resources.as_file(resources.files(__package__) / "manual_grader.html") as template:
+        shutil.copyfile(template, index)
+    return index
+
+
+def import_manual_scores(eval_dataset: List[types.EvalData], path: str) -> int:
+    """
+    Set the scores exported by the viewer on the matching eval items, returns how many were set.
+    Scores exported for another dataset raise a ValueError, lines keyed by `score_key` as written
+    by the evaluator.js viewer are matched by key.
+    """
+    by_index: Dict[int, float] = {}
+    by_key: Dict[str, float] = {}
+    runs = set()
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get("score") is None:
+                continue
+            if "index" in entry:
+                runs.add(entry["run"])
+                by_index[entry["index"]] = float(entry["score"])
+            else:
+                by_key[entry["key"]] = float(entry["score"])
+    if runs and runs != {dataset_id(eval_dataset)}:
+        raise ValueError(
+            f"The scores were exported for dataset {', '.join(sorted(runs))}, not this one")
+    applied = 0
+    for index, (item, _, record) in enumerate(_records(eval_dataset)):
+        score = by_index.get(index, by_key.get(record["key"]))
+        if score is not None:
+            item.score = score
+            applied += 1
+    return applied
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import dspy
+import numpy as np
+import pydantic
+from . import data_types as types
+from .execute import run_parallel
+
+
+class MatrixResult(pydantic.BaseModel):
+    responses: Dict[str, types.ResponseData] = pydantic.Field(
+        description="The responses of every model, keyed by model name")
+    model_config = pydantic.ConfigDict(arbitrary_types_allowed=True)
+
+    def score_table(self, score: Optional[Callable[[Any], float]] = None):
+        """
+        A model x item pandas DataFrame of scores, `score` maps a value to a float and defaults to
+        the value itself, failed items are NaN.
+        """
+        import pandas as pd
+        score = score or float
+        rows = {model: [np.nan if value is None else score(value) for value in response.data]
+                for model, response in self.responses.items()}
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def model_name(lm: dspy.LM) -> str:
+    return lm.model.split("/")[-1]
+
+
+def run_matrix(module: types.ForwardModule[types.T, types.R],
+               args_list: List[types.T],
+               lms: Dict[str, dspy.LM] | List[dspy.LM],
+               concurrency: int | Dict[str, int]) -> MatrixResult:
+    """
+    Run one module over the same inputs with every LM at once, each model within its own
+    concurrency limit, so a comparison takes about as long as the slowest model. A list of LMs
+    is keyed by the model name without its provider prefix, e.g. "bedrock-haiku".
+    """
+    if not isinstance(lms, dict):
+        lms = {model_name(lm): lm for lm in lms}
+    limits = concurrency if isinstance(concurrency, dict) else {
+        model: concurrency for model in lms}
+    with ThreadPoolExecutor(max_workers=max(len(lms), 1)) as ex:
+        futures = {model: ex.submit(run_parallel, module, args_list, lm, limits[model])
+                   for model, lm in lms.items()}
+        return MatrixResult(responses={model: future.result() for model, future in futures.items()})
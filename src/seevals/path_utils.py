@@ -1,4 +1,5 @@
-from typing import Type, Dict
+from functools import lru_cache
+from typing import Any, Type, Dict, List
 import pydantic
 from jsonpath_ng import parse
 
@@ -80,3 +81,26 @@ def _generate_from_schema(schema: Dict, defs: Dict) -> any:
 
     # Default fallback
     return None
+
+
+@lru_cache(maxsize=None)
+def _parse_path(query_path: str):
+    return parse(query_path)
+
+
+def resolve_view(data: Dict, views: List[str]) -> Dict[str, Any]:
+    """
+    Resolve the view paths of an eval item against the raw instance data.
+
+    Args:
+        data: The dumped instance the eval item was sampled from
+        views: JSONPath query strings to project out of the instance
+
+    Returns:
+        A mapping of each view path to its value, a list when the path matches more than once
+    """
+    resolved = {}
+    for view in views:
+        values = [match.value for match in _parse_path(view).find(data)]
+        resolved[view] = values[0] if len(values) == 1 else values
+    return resolved
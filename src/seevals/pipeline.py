@@ -0,0 +1,92 @@
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+import dspy
+import pydantic
+from . import data_types as types
+
+# tells a stage worker there is no more work
+_DONE = object()
+
+
+class Stage(pydantic.BaseModel):
+    module: Any = pydantic.Field(
+        description="The module run on every item reaching the stage")
+    lm: Any = pydantic.Field(
+        description="The LM the module is run with")
+    concurrency: int = pydantic.Field(
+        default=1, description="The number of workers of the stage", ge=1)
+    prepare: Optional[Callable[[Any, Any], Any]] = pydantic.Field(
+        default=None, description="Builds the stage input from the previous stage's (input, value), returning None drops the item")
+    queue_size: Optional[int] = pydantic.Field(
+        default=None, description="The bound of the stage's input queue, defaults to twice the concurrency")
+    model_config = pydantic.ConfigDict(arbitrary_types_allowed=True)
+
+
+def run_pipeline(stages: List[Stage], args_list: List[Any]) -> List[types.ResponseData]:
+    """
+    Run the stages as a pipeline, every item flows to the next stage as soon as it finishes the
+    previous one. Stages are connected by bounded queues so a slow stage holds back the ones
+    before it instead of buffering everything. Returns one ResponseData per stage, indexed like
+    `args_list`, items that failed or were dropped are None. As with `run_parallel` the first
+    error is raised once all items are done.
+    """
+    results = [[None] * len(args_list) for _ in stages]
+    preds = [[None] * len(args_list) for _ in stages]
+    queues = [queue.Queue(maxsize=stage.queue_size or 2 * stage.concurrency)
+              for stage in stages]
+    remaining = [stage.concurrency for stage in stages]
+    errors: List[Exception] = []
+    lock = threading.Lock()
+
+    def finish(s: int):
+        for _ in range(stages[s].concurrency):
+            queues[s].put(_DONE)
+
+    def feed():
+        for i, args in enumerate(args_list):
+            queues[0].put((i, args))
+        finish(0)
+
+    def work(s: int):
+        stage = stages[s]
+        next_stage = stages[s + 1] if s + 1 < len(stages) else None
+        while True:
+            task = queues[s].get()
+            if task is _DONE:
+                break
+            idx, args = task
+            try:
+                with dspy.context(lm=stage.lm):
+                    prediction = stage.module(args)
+                    value = stage.module.get_value(prediction)
+                # thread-safe because they write to different areas of memory
+                results[s][idx], preds[s][idx] = value, prediction
+                if next_stage is None:
+                    continue
+                next_args = value if next_stage.prepare is None else next_stage.prepare(
+                    args, value)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                continue
+            if next_args is not None:
+                # blocks while the next stage is saturated
+                queues[s + 1].put((idx, next_args))
+        with lock:
+            remaining[s] -= 1
+            last = remaining[s] == 0
+        if last and next_stage is not None:
+            finish(s + 1)
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    for s, stage in enumerate(stages):
+        threads.extend(threading.Thread(target=work, args=(s,), daemon=True)
+                       for _ in range(stage.concurrency))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return [types.ResponseData(data=data, debug=debug) for data, debug in zip(results, preds)]
@@ -0,0 +1,118 @@
+import os
+from typing import Any, Dict, List, Optional, Sequence
+import dspy
+from dspy.adapters.utils import format_field_value
+from . import data_types as types
+from .fake_lm import FakeLM
+from .schema import CompactSchemaAdapter
+
+# marks a content block as a prompt cache breakpoint for providers with explicit caching
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+class PromptCaptured(Exception):
+    ...
+
+
+class SharedPrefixAdapter(CompactSchemaAdapter):
+    """
+    Renders the `shared` input fields, e.g. the criteria every item of a run is graded against, into
+    the system message after the instructions and output structure, so everything that is the same
+    for every call is one leading message and only the per-item fields follow. With `cache_control`
+    the system message is marked as a cache breakpoint for providers that only cache explicitly
+    marked prefixes (Anthropic, Bedrock, Gemini through litellm). Works for every module, install
+    with `dspy.configure(adapter=SharedPrefixAdapter())`.
+    """
+
+    def __init__(self, shared: Sequence[str] = ("criteria",), cache_control: bool = True, **kwargs):
+        super().__init__(**kwargs)
+        self.shared = list(shared)
+        self.cache_control = cache_control
+
+    def format(self, signature, demos: List[Dict[str, Any]], inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        shared = [name for name in self.shared if name in signature.input_fields and name in inputs]
+        # the user message skips input fields that are not in the inputs
+        messages = super().format(signature, demos, {name: value for name, value in inputs.items()
+                                                     if name not in shared})
+        system = messages[0]["content"]
+        for name in shared:
+            value = format_field_value(field_info=signature.input_fields[name], value=inputs[name])
+            system += f"\n\n[[ ## {name} ## ]]\n{value}"
+        messages[0]["content"] = ([{"type": "text", "text": system, "cache_control": CACHE_CONTROL}]
+                                  if self.cache_control else system)
+        return messages
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    content = message["content"]
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+def format_messages(messages: List[Dict[str, Any]]) -> str:
+    return "\n\n".join(f"{message['role']}: {message_text(message)}" for message in messages)
+
+
+def render_messages(module: types.ForwardModule, args_list: Sequence[Any],
+                    adapter: Optional[dspy.Adapter] = None) -> List[List[Dict[str, Any]]]:
+    """
+    The messages of the first LM call of a module for every input, rendered offline by an LM that
+    records the messages instead of answering. Uses the configured adapter unless one is given.
+    """
+    captured: List[List[Dict[str, Any]]] = []
+
+    def capture(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        captured.append(messages)
+        raise PromptCaptured()
+
+    rendered = []
+    overrides = {} if adapter is None else {"adapter": adapter}
+    with dspy.context(lm=FakeLM(capture, model="prompt-capture"), **overrides):
+        for args in args_list:
+            captured.clear()
+            try:
+                module(args)
+            except Exception:
+                # errors before the LM was called are the module's own
+                if not captured:
+                    raise
+            rendered.append(captured[0])
+    return rendered
+
+
+def render_prompts(module: types.ForwardModule, args_list: Sequence[Any],
+                   adapter: Optional[dspy.Adapter] = None) -> List[str]:
+    return [format_messages(messages) for messages in render_messages(module, args_list, adapter)]
+
+
+def prefix_reuse_ratio(prompts: Sequence[str]) -> float:
+    """
+    The share of the characters of a run's prompts that an automatic prefix cache could serve, each
+    prompt counts its longest common prefix with any other prompt of the run. Identical prompts give 1.0.
+    """
+    if len(prompts) < 2:
+        return 0.0
+    # the longest common prefix with any other string is with a neighbour in sorted order
+    ordered = sorted(prompts)
+    common = [len(os.path.commonprefix([a, b]))
+              for a, b in zip(ordered, ordered[1:])]
+    shared = [max(before, after)
+              for before, after in zip([0] + common, common + [0])]
+    return sum(shared) / sum(len(prompt) for prompt in ordered)
+
+
+def cached_prefix_ratio(rendered: Sequence[List[Dict[str, Any]]]) -> float:
+    """
+    The share of the characters of a run's prompts that an explicit prompt cache serves: the
+    messages up to the last block marked with `cache_control`, when they are the same for every call.
+    """
+    cached = 0
+    for messages in rendered:
+        end = max((i + 1 for i, message in enumerate(messages) if isinstance(message["content"], list)
+                   and any("cache_control" in block for block in message["content"])), default=0)
+        # a prefix that is the same for every call is the same as the first call's
+        if end and messages[:end] == rendered[0][:end]:
+            cached += sum(len(message_text(message)) for message in messages[:end])
+    total = sum(len(message_text(message)) for messages in rendered for message in messages)
+    return cached / total if total else 0.0
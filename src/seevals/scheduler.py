@@ -0,0 +1,120 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+# lower is served first
+INTERACTIVE = 0
+BULK = 1
+
+
+class FileSlots:
+    """
+    A cross-process concurrency cap shared by every process pointing at the same directory, each
+    in-flight call holds an exclusive lock on one slot file. The first `reserved` slots are kept for
+    INTERACTIVE calls so spot-checks from another process still get through while bulk jobs run.
+    Relies on POSIX `flock`, the rest of the scheduler also works without it.
+    """
+
+    def __init__(self, directory: str, capacity: int, reserved: int = 0, poll_interval: float = 0.05):
+        if not 0 <= reserved < capacity:
+            raise ValueError(
+                f"Expected 0 <= reserved < capacity but got reserved={reserved} capacity={capacity}")
+        os.makedirs(directory, exist_ok=True)
+        self.paths = [os.path.join(directory, f"slot-{i}.lock")
+                      for i in range(capacity)]
+        self.reserved = reserved
+        self.poll_interval = poll_interval
+
+    def acquire(self, priority: int) -> int:
+        import fcntl
+        paths = self.paths if priority == INTERACTIVE else self.paths[self.reserved:]
+        while True:
+            for path in paths:
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except BlockingIOError:
+                    os.close(fd)
+            time.sleep(self.poll_interval)
+
+    def release(self, fd: int):
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class Job:
+    def __init__(self, scheduler: "FairScheduler", name: str, weight: float, priority: int):
+        if weight <= 0:
+            raise ValueError(f"Expected a positive weight but got {weight}")
+        self.scheduler = scheduler
+        self.name = name
+        self.weight = weight
+        self.priority = priority
+        self.last_finish = 0.0
+        self.served = 0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        fd = self.scheduler.acquire(self)
+        try:
+            yield
+        finally:
+            self.scheduler.release(fd)
+
+
+class FairScheduler:
+    """
+    Shares `capacity` concurrent LM calls between the jobs of one process. Waiting calls of the
+    most urgent priority go first, within a priority weighted fair queuing serves the call with the
+    lowest virtual finish time, so while both are backlogged a job of weight 2 gets twice the calls
+    of a job of weight 1 and a small job is never stuck behind a large one. With `slots` the
+    capacity is additionally shared with other processes.
+    """
+
+    def __init__(self, capacity: int, slots: Optional[FileSlots] = None):
+        self.capacity = capacity
+        self.slots = slots
+        self.in_use = 0
+        self.virtual_time = 0.0
+        self._waiting: List = []
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+
+    def job(self, name: str, weight: float = 1.0, priority: int = BULK) -> Job:
+        return Job(self, name, weight, priority)
+
+    def acquire(self, job: Job) -> Optional[int]:
+        with self._cond:
+            start = max(self.virtual_time, job.last_finish)
+            finish = start + 1.0 / job.weight
+            job.last_finish = finish
+            entry = (job.priority, finish, next(self._tickets), start)
+            heapq.heappush(self._waiting, entry)
+            while self.in_use >= self.capacity or self._waiting[0] is not entry:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self.in_use += 1
+            self.virtual_time = start
+            job.served += 1
+            # the next waiter may also fit
+            self._cond.notify_all()
+        if self.slots is None:
+            return None
+        try:
+            return self.slots.acquire(job.priority)
+        except BaseException:
+            self.release(None)
+            raise
+
+    def release(self, fd: Optional[int]):
+        if fd is not None:
+            self.slots.release(fd)
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify_all()
@@ -0,0 +1,207 @@
+"""
+Compact JSON schemas for prompts. Typed output fields reach the LM through the adapter, install
+`CompactSchemaAdapter` to render their schemas compactly:
+
+    dspy.configure(lm=lm, adapter=schema.CompactSchemaAdapter())
+"""
+import json
+import typing
+from functools import lru_cache
+from typing import Any, Dict, List, Literal, Optional, Sequence
+import dspy
+import pydantic
+from dspy.adapters.chat_adapter import FieldInfoWithName
+from dspy.adapters.utils import translate_field_type
+from dspy.signatures.utils import get_dspy_field_type
+
+# keys that only label or restate the schema, the LM does not need them to produce valid output
+REDUNDANT_KEYS = {"title", "examples", "$schema"}
+
+
+def _abbreviate(description: str, max_description: Optional[int]) -> str:
+    if max_description is None or len(description) <= max_description:
+        return description
+    cut = description[:max_description].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def _compact(node: Any, defs: Dict[str, Any], inline: set, max_description: Optional[int], stack: tuple) -> Any:
+    if isinstance(node, list):
+        return [_compact(value, defs, inline, max_description, stack) for value in node]
+    if not isinstance(node, dict):
+        return node
+    ref = node.get("$ref")
+    if ref is not None and ref.startswith("#/$defs/"):
+        name = ref.split("/")[-1]
+        # recursive models keep their reference
+        if name in inline and name not in stack:
+            return _compact(defs[name], defs, inline, max_description, stack + (name,))
+        return node
+    compact = {}
+    for key, value in node.items():
+        if key in REDUNDANT_KEYS or key == "$defs":
+            continue
+        if key == "properties":
+            compact[key] = {name: _compact(prop, defs, inline, max_description, stack)
+                            for name, prop in value.items()}
+        elif key == "description":
+            compact[key] = _abbreviate(value, max_description)
+        else:
+            compact[key] = _compact(
+                value, defs, inline, max_description, stack)
+    return compact
+
+
+def _refs(node: Any) -> List[str]:
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        own = [ref.split("/")[-1]] if isinstance(ref, str) else []
+        return own + [name for value in node.values() for name in _refs(value)]
+    if isinstance(node, list):
+        return [name for value in node for name in _refs(value)]
+    return []
+
+
+def _recursive(defs: Dict[str, Any]) -> set:
+    """The defs that reference themselves, directly or through other defs."""
+    edges = {name: set(_refs(definition)) for name, definition in defs.items()}
+    recursive = set()
+    for name in defs:
+        seen, frontier = set(), set(edges[name])
+        while frontier:
+            current = frontier.pop()
+            if current == name:
+                recursive.add(name)
+                break
+            if current not in seen and current in edges:
+                seen.add(current)
+                frontier |= edges[current]
+    return recursive
+
+
+@lru_cache(maxsize=None)
+def compact_schema(model: Any, max_description: Optional[int] = None) -> str:
+    """
+    The JSON schema of a model, or any type pydantic can validate, for a prompt: titles and other redundant keys are stripped,
+    `$defs` are inlined wherever that is shorter than referencing them, descriptions are
+    abbreviated to `max_description` characters and the JSON has no whitespace. Cached per class.
+    """
+    schema = pydantic.TypeAdapter(model).json_schema()
+    defs = schema.get("$defs", {})
+    counts = {name: 0 for name in defs}
+    for name in _refs(schema):
+        counts[name] = counts.get(name, 0) + 1
+    recursive = _recursive(defs)
+    inline = set()
+    for name, definition in defs.items():
+        size = len(json.dumps(_compact(definition, {}, set(), max_description, ()),
+                              separators=(",", ":")))
+        ref = len(f'{{"$ref":"#/$defs/{name}"}}')
+        if name not in recursive and counts[name] * size <= size + len(name) + 3 + counts[name] * ref:
+            inline.add(name)
+    compact = _compact(schema, defs, inline, max_description, ())
+    kept = {name: _compact(definition, defs, inline, max_description, (name,))
+            for name, definition in defs.items() if name not in inline}
+    if kept:
+        compact["$defs"] = kept
+    return json.dumps(compact, ensure_ascii=False, separators=(",", ":"))
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # not installed, or the encoding can't be downloaded
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of `text` with tiktoken when available, otherwise ~4 characters per token."""
+    encoding = _encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text))
+
+
+class TokenCount(pydantic.BaseModel):
+    name: str
+    before: int = pydantic.Field(
+        description="Tokens with the full pydantic JSON schemas")
+    after: int = pydantic.Field(description="Tokens with compact schemas")
+
+    @property
+    def saved(self) -> int:
+        return self.before - self.after
+
+
+def _structured(annotation: Any) -> bool:
+    """Whether the ChatAdapter renders a JSON schema for an output field of this type."""
+    if isinstance(annotation, type):
+        return issubclass(annotation, pydantic.BaseModel) and not issubclass(annotation, dspy.Type)
+    origin = typing.get_origin(annotation)
+    return origin is not None and origin is not Literal
+
+
+class CompactSchemaAdapter(dspy.ChatAdapter):
+    """
+    A ChatAdapter that renders the schema of structured output fields with `compact_schema`
+    instead of the full pydantic JSON schema, parsing is unchanged.
+    """
+
+    def __init__(self, max_description: Optional[int] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.max_description = max_description
+
+    def format_field_type(self, name: str, field) -> str:
+        if get_dspy_field_type(field) == "output" and _structured(field.annotation):
+            schema = compact_schema(field.annotation, self.max_description)
+            return f"{{{name}}}        # note: the value you produce must adhere to the JSON schema: {schema}"
+        return translate_field_type(name, field)
+
+    def format_field_structure(self, signature) -> str:
+        def structure(fields):
+            return self.format_field_with_value({FieldInfoWithName(name=name, info=field): self.format_field_type(name, field)
+                                                 for name, field in fields.items()})
+
+        return "\n\n".join([
+            "All interactions will be structured in the following way, with the appropriate values filled in.",
+            structure(signature.input_fields),
+            structure(signature.output_fields),
+            "[[ ## completed ## ]]",
+        ])
+
+
+def system_prompt(signature, adapter: Optional[dspy.ChatAdapter] = None) -> str:
+    """The part of the ChatAdapter prompt that is the same for every call of a signature."""
+    adapter = adapter or dspy.ChatAdapter()
+    return "\n\n".join([adapter.format_field_description(signature),
+                        adapter.format_field_structure(signature),
+                        adapter.format_task_description(signature)])
+
+
+def schema_token_report(models: Sequence[Any], max_description: Optional[int] = None) -> List[TokenCount]:
+    return [TokenCount(name=getattr(model, "__name__", str(model)),
+                       before=count_tokens(json.dumps(pydantic.TypeAdapter(model).json_schema(), ensure_ascii=False)),
+                       after=count_tokens(compact_schema(model, max_description)))
+            for model in models]
+
+
+def signature_token_report(signatures: Sequence[type], embedded: Sequence[Any] = ()) -> List[TokenCount]:
+    """
+    Tokens of the static prompt of every signature, before as the ChatAdapter renders it with the
+    full schemas, after as the CompactSchemaAdapter renders it. Field descriptions that embed
+    `compact_schema(model)` of a model in `embedded` are counted with its full schema before.
+    """
+    full_schemas = {compact_schema(model): json.dumps(pydantic.TypeAdapter(model).json_schema(), ensure_ascii=False)
+                    for model in embedded}
+    report = []
+    for signature in signatures:
+        after = system_prompt(signature, CompactSchemaAdapter())
+        before = system_prompt(signature)
+        for compact, full in full_schemas.items():
+            before = before.replace(compact, full)
+        report.append(TokenCount(name=signature.__name__,
+                                 before=count_tokens(before), after=count_tokens(after)))
+    return report
@@ -1,18 +1,20 @@
+from __future__ import annotations
 import pydantic
-from typing import Dict, Type, List, TypeVar, Optional
-from . import data_types as types
+from typing import Dict, Type, List, TypeVar, Optional, TYPE_CHECKING
 import json
-import dspy
 from typing import Callable
 import numpy as np
 import math
 import os
-from scipy.stats import multivariate_hypergeom
 from itertools import product
 from itertools import combinations, chain
-from jsonpath_ng import parse
 from math import comb
 
+# dspy, scipy and data_types (which pulls in dspy) are imported where they are used so the
+# stats and I/O helpers load fast
+if TYPE_CHECKING:
+    from . import data_types as types
+
 
 def for_each_weak_composition(N: int, k: int, consume):
     """Stars & bars; calls `consume(view)` for each k-tuple.
@@ -91,8 +93,10 @@ def instructions(**kwargs):
 
 
 def generate_json_output_field(class_schema: Type[pydantic.BaseModel]):
+    import dspy
+    from .schema import compact_schema
     return dspy.OutputField(
-        description=f"A single, valid JSON object. Strictly adhere to the schema provided below. Ensure correct JSON syntax, including proper quoting and escaping. 'json_schema': {class_schema.model_json_schema()}. Prefix the output with ```json a json code block and suffix with ```")
+        description=f"A single, valid JSON object. Strictly adhere to the schema provided below. Ensure correct JSON syntax, including proper quoting and escaping. 'json_schema': {compact_schema(class_schema)}. Prefix the output with ```json a json code block and suffix with ```")
 
 
 def extract_json_from_code_block(raw: str) -> str:
@@ -151,22 +155,27 @@ def write_eval_dataset(path: str, eval_dataset: List[types.EvalData[LT]]):
             f.write(eval_data.model_dump_json()+'\n')
 
 
-def calc_hoeffding_error(num_samples: int, upper_bound: float, lower_bound: float, confidence: float) -> float:
+def calc_hoeffding_error(num_samples: int | np.ndarray, upper_bound: float | np.ndarray, lower_bound: float | np.ndarray, confidence: float) -> float | np.ndarray:
     sigma = 1 - confidence
     return np.sqrt(np.pow((upper_bound-lower_bound), 2) /
                    (2 * num_samples)) * np.log(2/(sigma))
 
 
-def calc_serfling_error(num_samples: int, population_size: int, upper_bound: float, lower_bound: float, confidence: float) -> float:
-    if (num_samples > population_size):
-        return np.nan
+def calc_serfling_error(num_samples: int | np.ndarray, population_size: int | np.ndarray, upper_bound: float | np.ndarray, lower_bound: float | np.ndarray, confidence: float) -> float | np.ndarray:
+    """Works elementwise on arrays, NaN where there are more samples than the population."""
+    num_samples = np.asarray(num_samples, dtype=float)
+    population_size = np.asarray(population_size, dtype=float)
     sigma = 1 - confidence
-    fpc = 1.0 - ((num_samples - 1)/population_size)
-    # piecewise function for fpc Theorem 2.4 and Corollary 2.5. https://arxiv.org/pdf/1309.4029
-    if num_samples >= population_size/2.0:
-        fpc = (1.0 - num_samples/population_size) * (1 + 1/num_samples)
-
-    return (upper_bound-lower_bound)*np.sqrt(fpc / (2 * num_samples) * np.log(2.0/(sigma)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # piecewise function for fpc Theorem 2.4 and Corollary 2.5. https://arxiv.org/pdf/1309.4029
+        fpc = np.where(num_samples >= population_size/2.0,
+                       (1.0 - num_samples/population_size) *
+                       (1 + 1/num_samples),
+                       1.0 - ((num_samples - 1)/population_size))
+        error = (upper_bound-lower_bound) * \
+            np.sqrt(fpc / (2 * num_samples) * np.log(2.0/(sigma)))
+    error = np.where(num_samples > population_size, np.nan, error)
+    return error[()] if error.ndim == 0 else error
 
 # here we use the multivariate hypergeometric distribution to calculate the coverage of an interv
 # here we produce a coverage region for the likelihood of a sample being produced by a configuration of the population
@@ -177,6 +186,7 @@ def calc_serfling_error(num_samples: int, population_size: int, upper_bound: flo
 
 
 def calc_multivariate_pmf(sample: List[int]):
+    from scipy.stats import multivariate_hypergeom
     result = multivariate_hypergeom.pmf(x=[1, 2, 3], m=[10, 10, 10], n=6)
     print(result)
 
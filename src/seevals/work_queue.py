@@ -0,0 +1,259 @@
+"""
+A durable SQLite task queue so several worker processes can work through one run of a ForwardModule.
+The default write-ahead log needs every worker on the host that holds the database, for workers on
+several hosts put it on a shared mount with working file locks and pass `journal_mode="DELETE"`
+(`--journal-mode DELETE`) everywhere.
+
+    queue = WorkQueue("./grading.db")
+    queue.enqueue("grades-v1", grading_inputs, agents.GradingInput[agents.AnalysisPlanningResult])
+    # on every worker
+    python -m seevals.work_queue work ./grading.db grades-v1 my_project.workers:grader --concurrency 20
+    # on the coordinator
+    grades = queue.wait("grades-v1", float)
+"""
+import argparse
+import importlib
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import dspy
+import pydantic
+import pydantic_core
+from . import data_types as types
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (run_id, idx)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (run_id, status);
+"""
+
+
+class Task(pydantic.BaseModel):
+    run_id: str
+    idx: int
+    payload: str
+    attempts: int
+
+
+class WorkerSpec(pydantic.BaseModel):
+    module: Any = pydantic.Field(
+        description="The ForwardModule run on every task")
+    lm: Any = pydantic.Field(description="The LM the module is run with")
+    input_type: Any = pydantic.Field(
+        description="The type the task payloads are validated as")
+    model_config = pydantic.ConfigDict(arbitrary_types_allowed=True)
+
+
+class WorkQueue:
+    """
+    Tasks are leased for `lease_seconds`, a task whose lease runs out (its worker died) is handed
+    out again, and a task that failed or timed out `max_attempts` times is marked failed. Every
+    process opening the database must use the same `journal_mode`.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600.0, max_attempts: int = 3,
+                 journal_mode: str = "WAL"):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.journal_mode = journal_mode
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=60.0, isolation_level=None)
+            # WAL shares its index through memory, which does not work across hosts
+            connection.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            if self.journal_mode.upper() == "WAL":
+                connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def enqueue(self, run_id: str, args_list: List[Any], input_type: Any) -> int:
+        """Add the inputs of a run, re-enqueueing a run that already exists leaves its tasks untouched."""
+        adapter = pydantic.TypeAdapter(input_type)
+        rows = [(run_id, idx, adapter.dump_json(args).decode())
+                for idx, args in enumerate(args_list)]
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT OR IGNORE INTO tasks (run_id, idx, payload) VALUES (?, ?, ?)", rows)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def _fail_expired(self, connection: sqlite3.Connection, run_id: str, now: float):
+        # an expired lease that used the last attempt will not be handed out again
+        connection.execute(
+            "UPDATE tasks SET status = 'failed', error = COALESCE(error, 'lease expired') "
+            "WHERE run_id = ? AND status = 'leased' AND lease_until < ? AND attempts >= ?",
+            (run_id, now, self.max_attempts))
+
+    def lease(self, run_id: str, worker: str, limit: int = 1) -> List[Task]:
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._fail_expired(connection, run_id, now)
+            rows = connection.execute(
+                "SELECT idx, payload, attempts FROM tasks WHERE run_id = ? AND "
+                "(status = 'pending' OR (status = 'leased' AND lease_until < ?)) "
+                "ORDER BY idx LIMIT ?", (run_id, now, limit)).fetchall()
+            connection.executemany(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE run_id = ? AND idx = ?",
+                [(worker, now + self.lease_seconds, run_id, idx) for idx, _, _ in rows])
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return [Task(run_id=run_id, idx=idx, payload=payload, attempts=attempts + 1)
+                for idx, payload, attempts in rows]
+
+    def ack(self, task: Task, worker: str, result: Any) -> bool:
+        """Store the result of a task, False when the lease was lost to another worker."""
+        cursor = self._connection().execute(
+            "UPDATE tasks SET status = 'done', result = ?, error = NULL "
+            "WHERE run_id = ? AND idx = ? AND status = 'leased' AND lease_owner = ?",
+            (pydantic_core.to_json(result).decode(), task.run_id, task.idx, worker))
+        return cursor.rowcount == 1
+
+    def fail(self, task: Task, worker: str, error: str):
+        status = 'failed' if task.attempts >= self.max_attempts else 'pending'
+        self._connection().execute(
+            "UPDATE tasks SET status = ?, error = ?, lease_owner = NULL, lease_until = NULL "
+            "WHERE run_id = ? AND idx = ? AND status = 'leased' AND lease_owner = ?",
+            (status, error, task.run_id, task.idx, worker))
+
+    def progress(self, run_id: str) -> Dict[str, int]:
+        connection = self._connection()
+        self._fail_expired(connection, run_id, time.time())
+        rows = connection.execute(
+            "SELECT status, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY status", (run_id,)).fetchall()
+        return dict(rows)
+
+    def is_finished(self, run_id: str) -> bool:
+        progress = self.progress(run_id)
+        return progress.get('pending', 0) == 0 and progress.get('leased', 0) == 0
+
+    def collect(self, run_id: str, result_type: Any) -> types.ResponseData:
+        """The results of a run in input order, failed and unfinished tasks are None."""
+        adapter = pydantic.TypeAdapter(Optional[result_type])
+        rows = self._connection().execute(
+            "SELECT status, result FROM tasks WHERE run_id = ? ORDER BY idx", (run_id,)).fetchall()
+        data = [adapter.validate_json(result) if status == 'done' else None
+                for status, result in rows]
+        return types.ResponseData(data=data, debug=[None] * len(data))
+
+    def wait(self, run_id: str, result_type: Any, poll_interval: float = 5.0,
+             timeout: Optional[float] = None) -> types.ResponseData:
+        """
+        Poll until every task is done or failed, raises TimeoutError after `timeout` seconds, e.g.
+        when expired leases with attempts left are waiting for a worker that no longer runs.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_finished(run_id):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Run {run_id} not finished after {timeout}s: {self.progress(run_id)}")
+            time.sleep(poll_interval if deadline is None
+                       else max(0.0, min(poll_interval, deadline - time.monotonic())))
+        return self.collect(run_id, result_type)
+
+
+def run_worker(queue: WorkQueue, run_id: str, spec: WorkerSpec, concurrency: int = 1,
+               poll_interval: float = 1.0, worker: Optional[str] = None) -> int:
+    """Pull and run tasks of a run until none are left, returns the number of tasks completed."""
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    adapter = pydantic.TypeAdapter(spec.input_type)
+    completed = 0
+    lock = threading.Lock()
+
+    def loop():
+        nonlocal completed
+        while True:
+            tasks = queue.lease(run_id, worker)
+            if not tasks:
+                if queue.is_finished(run_id):
+                    return
+                # other workers hold the remaining leases, one may expire
+                time.sleep(poll_interval)
+                continue
+            task = tasks[0]
+            try:
+                with dspy.context(lm=spec.lm):
+                    prediction = spec.module(
+                        adapter.validate_json(task.payload))
+                    value = spec.module.get_value(prediction)
+            except Exception as e:
+                queue.fail(task, worker, f"{type(e).__name__}: {e}")
+                continue
+            if queue.ack(task, worker, value):
+                with lock:
+                    completed += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        for future in [ex.submit(loop) for _ in range(concurrency)]:
+            future.result()
+    return completed
+
+
+def load_factory(path: str):
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(prog="python -m seevals.work_queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+    work = commands.add_parser(
+        "work", help="run tasks of a run until none are left")
+    work.add_argument("db")
+    work.add_argument("run_id")
+    work.add_argument(
+        "factory", help="module:callable returning a WorkerSpec")
+    work.add_argument("--concurrency", type=int, default=1)
+    work.add_argument("--lease-seconds", type=float, default=600.0)
+    work.add_argument("--max-attempts", type=int, default=3)
+    status = commands.add_parser("status", help="print the progress of a run")
+    status.add_argument("db")
+    status.add_argument("run_id")
+    for command in (work, status):
+        command.add_argument("--journal-mode", default="WAL", choices=["WAL", "DELETE"],
+                             help="DELETE when workers on several hosts share the database")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        print(WorkQueue(args.db, journal_mode=args.journal_mode).progress(args.run_id))
+        return
+    queue = WorkQueue(args.db, args.lease_seconds, args.max_attempts, args.journal_mode)
+    completed = run_worker(queue, args.run_id, load_factory(
+        args.factory)(), args.concurrency)
+    print(f"completed {completed} tasks, {queue.progress(args.run_id)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
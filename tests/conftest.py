@@ -0,0 +1,32 @@
+import pytest
+import seevals.data_types as types
+from seevals import agents
+
+
+@pytest.fixture
+def criteria() -> types.Criteria:
+    return types.Criteria(rubrics=[types.Rubric(ge=0, le=3, desc="a")], max_total_score=3)
+
+
+@pytest.fixture
+def grading_inputs(criteria):
+    """Builds `n` grading inputs of numbered scenarios graded against the `criteria` fixture."""
+    def make(n: int):
+        return [agents.GradingInput(criteria=criteria, input=agents.ScenarioArgs(scenario=str(i)))
+                for i in range(n)]
+    return make
+
+
+@pytest.fixture
+def eval_dataset():
+    """Two instances with one datum of three sampled entities each, every item viewed with its title."""
+    rubric = types.Rubric(ge=0, le=10, desc="entity is plausible")
+    dataset = []
+    for i in range(2):
+        raw = {"title": f"plan {i}", "entities": [f"entity-{3 * i + j}" for j in range(3)]}
+        items = [types.EvalItem(id=f"$.entities[{j}]", sample=types.Sample(num_samples=3),
+                                view=types.View(views=["$.title"]), data=entity)
+                 for j, entity in enumerate(raw["entities"])]
+        dataset.append(types.EvalData(raw_data=raw, data=[
+            types.EvalDatum(group_id="$.entities", items=items, rubric=rubric)]))
+    return dataset
@@ -0,0 +1,22 @@
+import re
+import seevals.data_types as types
+from seevals import agent_util, agents, execute
+from seevals.fake_lm import FakeLM
+
+
+def grade_by_entity(messages):
+    return {"reasoning": "r", "score": float(re.findall(r'entity-(\d+)', messages[-1]["content"])[-1])}
+
+
+def test_skip_scored_keeps_scores_aligned_with_their_items(eval_dataset):
+    items = [item for _, _, item in agent_util.iter_eval_items(eval_dataset)]
+    items[1].score = items[4].score = -1.0
+
+    inputs = agent_util.make_view_grading_inputs(eval_dataset, skip_scored=True)
+    grades = execute.run_parallel(agents.make_semantic_grader(types.ViewProjection), inputs, FakeLM(grade_by_entity), 2)
+    agent_util.apply_view_scores(eval_dataset, grades, skip_scored=True)
+
+    assert len(inputs) == 4
+    assert [item.score for item in items] == [0.0, -1.0, 2.0, 3.0, -1.0, 5.0]
+    assert inputs[0]["input"].view == {"$.title": "plan 0"}
+    assert inputs[-1]["input"].view == {"$.title": "plan 1"}
@@ -0,0 +1,28 @@
+import numpy as np
+import seevals.data_types as types
+from seevals import aggregate
+
+
+def make_grades(values):
+    return types.ResponseData(data=values, debug=[None] * len(values))
+
+
+def test_grade_frame_unset_max_total_score_uses_rubric_maxima():
+    criteria = types.Criteria(rubrics=[types.Rubric(ge=0, le=2, desc="a"),
+                                       types.Rubric(ge=0, le=3, desc="b")])
+    frame = aggregate.grade_frame(make_grades([1.0, 4.0, 2.0]), criteria, [0.5, 0.1, 0.3])
+
+    assert (frame["le"] == 5.0).all()
+    assert np.isfinite(frame["normalized"]).all()
+    summary = aggregate.summarize(frame)
+    assert (summary["hoeffding"] > 0).all()
+    correlation = aggregate.noise_correlation(frame)
+    assert correlation["pearson"].iloc[0] < 0
+
+
+def test_grade_frame_failed_grades_are_nan():
+    criteria = types.Criteria(rubrics=[types.Rubric(ge=0, le=2, desc="a")], max_total_score=2)
+    frame = aggregate.grade_frame(make_grades([1.0, None]), criteria)
+
+    assert frame["score"].isna().tolist() == [False, True]
+    assert aggregate.summarize(frame)["n"].iloc[0] == 1
@@ -0,0 +1,58 @@
+import dspy
+import pytest
+from seevals import agents, budget, execute
+from seevals.fake_lm import FakeLM
+
+PRICES = {"cheap": budget.ModelPrice(input=1.0, output=1.0), "dear": budget.ModelPrice(input=100.0, output=100.0)}
+
+
+class FailAfterAnswer(dspy.Module):
+    """Fails parsing the answer, after the LM was paid for it."""
+
+    def __init__(self):
+        self.grader = agents.make_semantic_grader(agents.ScenarioArgs)
+
+    def forward(self, input):
+        self.grader(input)
+        raise ValueError("unusable answer")
+
+    def get_value(self, prediction):
+        return prediction.score
+
+
+def test_failed_calls_record_their_usage(grading_inputs):
+    lm = FakeLM({"reasoning": "r", "score": 1.0}, completion_tokens=10, model="cheap")
+    shared = budget.Budget(max_cost=1.0, prices=PRICES)
+
+    with pytest.raises(ValueError):
+        execute.run_parallel(FailAfterAnswer(), grading_inputs(1), lm, 1, budget=shared)
+
+    report = shared.report()
+    assert report.total.calls == 1
+    assert report.total.completion_tokens == 10
+    assert report.total.cost == pytest.approx((report.total.prompt_tokens + 10) / 1_000_000)
+    assert shared._reserved_tokens == 0
+
+
+def test_successful_calls_carry_their_usage(grading_inputs):
+    lm = FakeLM({"reasoning": "r", "score": 1.0}, completion_tokens=10, model="cheap")
+    shared = budget.Budget(prices=PRICES)
+
+    grades = execute.run_parallel(agents.make_semantic_grader(agents.ScenarioArgs), grading_inputs(3), lm, 2,
+                                  budget=shared)
+
+    assert grades.data == [1.0] * 3
+    assert grades.debug[0].get_lm_usage()["cheap"]["completion_tokens"] == 10
+    assert shared.report().by_module["GraderGenerationModule"].calls == 3
+
+
+def test_shared_budget_prices_each_run_by_its_model(grading_inputs):
+    shared = budget.Budget(max_cost=1.0, prices=PRICES)
+    shared.start("cheap", 1)
+    shared.start("dear", 1)
+    args = grading_inputs(1)[0]
+
+    cheap = shared.admit(args, "cheap")
+    dear = shared.admit(args, "dear")
+
+    assert dear.cost == pytest.approx(100 * cheap.cost)
@@ -0,0 +1,62 @@
+import pytest
+import seevals.data_types as types
+from seevals import agents
+from seevals.fake_lm import FakeLM
+
+CRITERIA = types.Criteria(rubrics=[types.Rubric(ge=0, le=2, desc="a", scale="0 is bad, 1 is fair, 2 is good"),
+                                   types.Rubric(ge=0, le=1, desc="b")], max_total_score=3)
+
+
+def grade(cheap_score, **kwargs):
+    cheap = FakeLM({"reasoning": "cheap", "score": cheap_score}, model="cheap")
+    expensive = FakeLM({"reasoning": "expensive", "score": 2.0}, model="expensive")
+    grader = agents.make_cascade_grader(agents.ScenarioArgs, cheap, expensive, **kwargs)
+    prediction = grader(agents.GradingInput(criteria=CRITERIA, input=agents.ScenarioArgs(scenario="a")))
+    return prediction, cheap, expensive
+
+
+def test_score_levels():
+    assert agents.score_levels(CRITERIA) == [0.0, 1.0, 2.0, 3.0]
+    capped = CRITERIA.model_copy(update={"max_total_score": 2})
+    assert agents.score_levels(capped) == [0.0, 1.0, 2.0]
+
+
+@pytest.mark.parametrize("cheap_score, escalated", [(1.0, False), (3.0, False), (1.5, True), (2.4, True), (3.5, True)])
+def test_default_cascade_escalates_between_levels(cheap_score, escalated):
+    prediction, cheap, expensive = grade(cheap_score)
+
+    assert prediction.escalated == escalated
+    assert prediction.score == (2.0 if escalated else cheap_score)
+    assert (cheap.calls, expensive.calls) == (1, int(escalated))
+
+
+def test_cascade_samples_each_call_the_cheap_lm():
+    prediction, cheap, expensive = grade(1.0, samples=3)
+
+    assert prediction.cheap_scores == [1.0] * 3
+    assert (cheap.calls, expensive.calls) == (3, 0)
+
+
+class RecordingLM(FakeLM):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = []
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        self.requests.append(kwargs)
+        return super().forward(prompt, messages, **kwargs)
+
+
+def test_cascade_samples_bypass_the_cache_at_the_same_temperature():
+    cheap = RecordingLM({"reasoning": "cheap", "score": 1.0}, model="cheap")
+    grader = agents.make_cascade_grader(agents.ScenarioArgs, cheap, cheap, samples=3, temperature=0.7)
+
+    grader(agents.GradingInput(criteria=CRITERIA, input=agents.ScenarioArgs(scenario="a")))
+
+    assert [(request["temperature"], request["cache"]) for request in cheap.requests] == [(0.7, False)] * 3
+
+
+def test_explicit_boundaries_override_the_criteria():
+    prediction, _, _ = grade(1.5, boundaries=[0.5], margin=0.1)
+
+    assert not prediction.escalated
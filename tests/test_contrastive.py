@@ -0,0 +1,18 @@
+import numpy as np
+from seevals import agents
+
+
+def test_multi_noise_factors_keep_level_order(grading_inputs):
+    levels = [0.1, 0.5, 0.9]
+    inputs = agents.from_grading_inputs_multi(grading_inputs(200), levels, np.random.default_rng(0))
+
+    factors = np.array([input['noise_factors'] for input in inputs])
+    assert (np.diff(factors, axis=1) > 0).all()
+    assert (factors > 0).all()
+    np.testing.assert_allclose(factors.mean(axis=0), levels, atol=0.01)
+
+
+def test_multi_noise_factors_zero_scale_is_exact(grading_inputs):
+    inputs = agents.from_grading_inputs_multi(grading_inputs(3), [0.1, 0.5], np.random.default_rng(0), scale=0)
+
+    assert all(input['noise_factors'] == [0.1, 0.5] for input in inputs)
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from seevals import dedup
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.9])
+def test_lsh_params_favour_recall_at_the_threshold(threshold):
+    bands, rows = dedup.lsh_params(threshold, 128)
+
+    assert bands * rows <= 128
+    assert (1 / bands) ** (1 / rows) < threshold - 0.03
+    assert 1 - (1 - threshold ** rows) ** bands > 0.9
+
+
+def test_find_near_duplicates_groups_small_edits():
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in rng.integers(0, 1000, size=200)]
+    base = " ".join(words)
+    edited = " ".join(words[:100] + ["changed"] + words[101:])
+    other = " ".join(f"x{i}" for i in rng.integers(0, 1000, size=200))
+
+    result = dedup.find_near_duplicates([base, edited, other], threshold=0.9)
+
+    assert result.assignment == [0, 0, 2]
@@ -0,0 +1,17 @@
+import dspy
+from seevals.fake_lm import FakeLM
+
+
+class Answer(dspy.Signature):
+    question: str = dspy.InputField()
+    answer: str = dspy.OutputField()
+
+
+def test_usage_is_tracked_once_per_call():
+    lm = FakeLM({"answer": "yes"}, completion_tokens=7, model="fake")
+    with dspy.context(lm=lm, track_usage=True):
+        prediction = dspy.Predict(Answer)(question="ok?")
+
+    usage = prediction.get_lm_usage()["fake"]
+    assert usage["completion_tokens"] == 7
+    assert usage["total_tokens"] == usage["prompt_tokens"] + 7
@@ -0,0 +1,87 @@
+import time
+from seevals import agents, budget, execute, hedging
+from seevals.fake_lm import FakeLM
+
+PRICES = {"fake": budget.ModelPrice(input=1.0, output=1.0), "backup": budget.ModelPrice(input=1.0, output=1.0)}
+
+
+def run(inputs, lm, policy, shared=None):
+    return execute.run_parallel(agents.make_semantic_grader(agents.ScenarioArgs), inputs, lm, len(inputs),
+                                budget=shared, hedge=policy)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_slow_calls_are_hedged_to_the_backup_lm(grading_inputs):
+    backup = FakeLM({"reasoning": "r", "score": 2.0}, model="backup")
+    policy = hedging.HedgePolicy(percentile=50, max_fraction=1.0, min_samples=5, lm=backup)
+    # learn the usual latency
+    run(grading_inputs(5), FakeLM({"reasoning": "r", "score": 1.0}, latency=0.01), policy)
+
+    start = time.monotonic()
+    grades = run(grading_inputs(3), FakeLM({"reasoning": "r", "score": 1.0}, latency=2.0), policy)
+
+    assert time.monotonic() - start < 1.0
+    assert grades.data == [2.0] * 3
+    stats = policy.stats()
+    assert (stats.hedges, stats.backup_wins) == (3, 3)
+
+
+def test_hedges_are_capped_by_max_fraction(grading_inputs):
+    backup = FakeLM({"reasoning": "r", "score": 2.0}, model="backup")
+    policy = hedging.HedgePolicy(percentile=50, max_fraction=0.0, min_samples=5, lm=backup)
+    run(grading_inputs(5), FakeLM({"reasoning": "r", "score": 1.0}, latency=0.01), policy)
+
+    grades = run(grading_inputs(2), FakeLM({"reasoning": "r", "score": 1.0}, latency=0.1), policy)
+
+    assert grades.data == [1.0] * 2
+    assert policy.stats().hedges == 0
+    assert backup.calls == 0
+
+
+def test_nothing_is_hedged_before_min_samples(grading_inputs):
+    policy = hedging.HedgePolicy(min_samples=20)
+
+    run(grading_inputs(5), FakeLM({"reasoning": "r", "score": 1.0}), policy)
+
+    assert policy.threshold() is None
+    assert policy.stats().calls == 5
+
+
+def test_budget_records_both_attempts_of_a_hedged_call(grading_inputs):
+    backup = FakeLM({"reasoning": "r", "score": 2.0}, completion_tokens=10, model="backup")
+    policy = hedging.HedgePolicy(percentile=50, max_fraction=1.0, min_samples=5, lm=backup)
+    run(grading_inputs(5), FakeLM({"reasoning": "r", "score": 1.0}, latency=0.01), policy)
+    shared = budget.Budget(max_cost=1.0, prices=PRICES)
+
+    slow = FakeLM({"reasoning": "r", "score": 1.0}, latency=0.5, completion_tokens=10)
+    grades = run(grading_inputs(3), slow, policy, shared)
+
+    assert grades.data == [2.0] * 3
+    # the ignored attempts are recorded once they finish
+    wait_for(lambda: shared.report().total.calls == 6)
+    report = shared.report()
+    assert report.total.calls == 6
+    assert report.total.completion_tokens == 60
+    assert shared._reserved_tokens == 0
+
+
+def test_hedges_that_do_not_fit_the_budget_are_not_sent(grading_inputs):
+    backup = FakeLM({"reasoning": "r", "score": 2.0}, model="backup")
+    policy = hedging.HedgePolicy(percentile=50, max_fraction=1.0, min_samples=5, lm=backup)
+    run(grading_inputs(5), FakeLM({"reasoning": "r", "score": 1.0}, latency=0.01), policy)
+    inputs = grading_inputs(1)
+    # room for one attempt only
+    shared = budget.Budget(max_tokens=int(1.5 * sum(budget.Budget().estimate(inputs[0])[1:])), prices=PRICES)
+
+    grades = run(inputs, FakeLM({"reasoning": "r", "score": 1.0}, latency=0.1), policy, shared)
+
+    assert grades.data == [1.0]
+    assert policy.stats().hedges == 0
+    assert backup.calls == 0
+    assert shared.report().total.calls == 1
+    assert shared.report().stopped is None
@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import pytest
+
+PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "import_time.py")
+spec = importlib.util.spec_from_file_location("import_time", PATH)
+import_time = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(import_time)
+
+
+@pytest.mark.parametrize("statement", list(import_time.ENTRY_POINTS.values()), ids=list(import_time.ENTRY_POINTS))
+def test_light_entry_points_load_no_heavy_modules(statement):
+    assert import_time.measure_import(statement, repeat=1)["heavy"] == []
+
+
+def test_submodules_still_load_on_access():
+    result = import_time.measure_import("import seevals; seevals.agents", repeat=1)
+
+    assert "dspy" in result["heavy"]
@@ -0,0 +1,47 @@
+from seevals import agent_util, agents, incremental
+from seevals.fake_lm import FakeLM
+
+
+def fingerprints(dataset, namespace=""):
+    return incremental.GradeManifest("unused.jsonl", namespace).fingerprints(dataset)
+
+
+def test_fingerprint_changes_with_the_rubric(eval_dataset):
+    before = fingerprints(eval_dataset)
+    eval_dataset[0].data[0].rubric = eval_dataset[0].data[0].rubric.model_copy(update={"le": 5})
+
+    after = fingerprints(eval_dataset)
+
+    assert [a != b for a, b in zip(before, after)] == [True] * 3 + [False] * 3
+
+
+def test_grader_namespace_changes_with_the_model_and_the_prompt():
+    grader = agents.make_semantic_grader(agents.ScenarioArgs)
+    namespace = incremental.grader_namespace(grader, FakeLM({}, model="a"))
+    assert namespace == incremental.grader_namespace(agents.make_semantic_grader(agents.ScenarioArgs),
+                                                     FakeLM({}, model="a"))
+    assert namespace != incremental.grader_namespace(grader, FakeLM({}, model="b"))
+
+    predict = grader.grader.predict
+    predict.signature = predict.signature.with_instructions("Grade harshly.")
+    assert namespace != incremental.grader_namespace(grader, FakeLM({}, model="a"))
+
+
+def test_fingerprint_changes_with_the_namespace(eval_dataset):
+    assert set(fingerprints(eval_dataset, "a")).isdisjoint(fingerprints(eval_dataset, "b"))
+
+
+def test_manifest_round_trips_the_grades(tmp_path, eval_dataset):
+    path = str(tmp_path / "manifest.jsonl")
+    items = [item for _, _, item in agent_util.iter_eval_items(eval_dataset)]
+    for i, item in enumerate(items[:4]):
+        item.score = float(i)
+    assert incremental.GradeManifest(path).record(eval_dataset) == 4
+    for item in items:
+        item.score = None
+
+    manifest = incremental.GradeManifest(path)
+
+    assert manifest.apply(eval_dataset) == 4
+    assert [item.score for item in items] == [0.0, 1.0, 2.0, 3.0, None, None]
+    assert manifest.record(eval_dataset) == 0
@@ -0,0 +1,50 @@
+import json
+import os
+import pytest
+from seevals import agent_util, manual_grader
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, "manifest.js")) as f:
+        return json.loads(f.read().split("=", 1)[1].rstrip().rstrip(";"))
+
+
+def write_viewer_export(path, manifest, scores):
+    # the lines the viewer exports, keyed by the position of the item
+    with open(path, "w") as f:
+        for index, score in scores.items():
+            f.write(json.dumps({"run": manifest["dataset_id"], "index": index, "score": score}) + "\n")
+
+
+def test_exported_scores_round_trip(tmp_path, eval_dataset):
+    manual_grader.export_manual_grader(eval_dataset, str(tmp_path / "site"), page_size=4)
+    manifest = load_manifest(str(tmp_path / "site"))
+    path = str(tmp_path / "scores.jsonl")
+    write_viewer_export(path, manifest, {0: 1.0, 3: 4.0, 5: 6.0})
+
+    assert (manifest["total"], manifest["pages"]) == (6, 2)
+    assert manifest["dataset_id"] == manual_grader.dataset_id(eval_dataset)
+    assert manual_grader.import_manual_scores(eval_dataset, path) == 3
+    items = [item for _, _, item in agent_util.iter_eval_items(eval_dataset)]
+    assert [item.score for item in items] == [1.0, None, None, 4.0, None, 6.0]
+
+
+def test_scores_of_another_export_are_rejected(tmp_path, eval_dataset):
+    manual_grader.export_manual_grader(eval_dataset, str(tmp_path / "site"))
+    manifest = load_manifest(str(tmp_path / "site"))
+    path = str(tmp_path / "scores.jsonl")
+    write_viewer_export(path, manifest, {0: 1.0})
+    eval_dataset[0].data[0].items[0].data = "changed"
+
+    with pytest.raises(ValueError):
+        manual_grader.import_manual_scores(eval_dataset, path)
+
+
+def test_scores_keyed_like_the_evaluator_viewer_are_imported(tmp_path, eval_dataset):
+    datum = eval_dataset[1].data[0]
+    path = str(tmp_path / "scores.jsonl")
+    with open(path, "w") as f:
+        f.write(json.dumps({"key": manual_grader.score_key(1, datum, datum.items[2]), "score": 7}) + "\n")
+
+    assert manual_grader.import_manual_scores(eval_dataset, path) == 1
+    assert datum.items[2].score == 7.0
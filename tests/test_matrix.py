@@ -0,0 +1,31 @@
+import re
+import numpy as np
+import seevals.data_types as types
+from seevals import agent_util, agents, matrix
+from seevals.fake_lm import FakeLM
+
+
+def grade_by_rubric(offset):
+    def answer(messages):
+        rubric = int(re.findall(r'rubric-(\d+)', messages[-1]["content"])[-1])
+        return {"reasoning": "r", "score": float(rubric + offset)}
+    return answer
+
+
+def test_models_by_criteria_matrix():
+    scenarios = [agents.ScenarioArgs(scenario=str(i)) for i in range(2)]
+    inputs = [grading_input
+              for rubric in range(2)
+              for grading_input in agent_util.make_grading_inputs(
+                  types.Criteria(rubrics=[types.Rubric(ge=0, le=3, desc=f"rubric-{rubric}")]), scenarios)]
+    lms = [FakeLM(grade_by_rubric(0), model="openai/small"), FakeLM(grade_by_rubric(1), model="openai/large")]
+
+    result = matrix.run_matrix(agents.make_semantic_grader(agents.ScenarioArgs), inputs, lms, {"small": 1, "large": 2})
+    # a call skipped by a budget
+    result.responses["small"].data[3] = None
+    table = result.score_table()
+
+    assert list(table.index) == ["small", "large"]
+    np.testing.assert_array_equal(table.loc["small"], [0.0, 0.0, 1.0, np.nan])
+    np.testing.assert_array_equal(table.loc["large"], [1.0, 1.0, 2.0, 2.0])
+    assert all(lm.calls == 4 for lm in lms)
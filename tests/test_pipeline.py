@@ -0,0 +1,54 @@
+import re
+import pytest
+from seevals import agents, pipeline
+from seevals.fake_lm import FakeLM
+
+def scenario(messages) -> int:
+    return int(re.findall(r'"scenario": "(\d+)"', messages[-1]["content"])[-1])
+
+
+def grade_by_parity(messages):
+    return {"reasoning": "r", "score": float(scenario(messages) % 2)}
+
+
+def contrast(messages):
+    return {"reasoning": "r", "output": agents.ScenarioArgs(scenario=f"{scenario(messages)}0")}
+
+
+def stages(grader_lm, prepare):
+    return [pipeline.Stage(module=agents.make_semantic_grader(agents.ScenarioArgs), lm=grader_lm, concurrency=3),
+            pipeline.Stage(module=agents.make_contrastive_grader(agents.ScenarioArgs), lm=FakeLM(contrast),
+                           concurrency=2, prepare=prepare, queue_size=1)]
+
+
+def to_contrastive(args, score):
+    # only items that passed reach the second stage
+    if score < 1:
+        return None
+    return agents.ContrastiveInput(criteria=args["criteria"], noise_factor=0.5, input=args["input"])
+
+
+def test_items_flow_through_stages_in_input_order(grading_inputs):
+    inputs = grading_inputs(10)
+
+    grades, contrasts = pipeline.run_pipeline(stages(FakeLM(grade_by_parity, latency=0.005), to_contrastive), inputs)
+
+    assert grades.data == [float(i % 2) for i in range(10)]
+    assert [None if c is None else c.scenario for c in contrasts.data] == [
+        None if i % 2 == 0 else f"{i}0" for i in range(10)]
+
+
+def test_errors_are_raised_after_all_items_finish(grading_inputs):
+    inputs = grading_inputs(6)
+    grader_lm = FakeLM(grade_by_parity)
+    contrast_stage = stages(grader_lm, to_contrastive)
+
+    def fail_on_three(args, score):
+        if args["input"].scenario == "3":
+            raise ValueError("bad item")
+        return to_contrastive(args, score)
+
+    contrast_stage[1].prepare = fail_on_three
+    with pytest.raises(ValueError):
+        pipeline.run_pipeline(contrast_stage, inputs)
+    assert grader_lm.calls == 6
@@ -0,0 +1,53 @@
+import dspy
+import pytest
+import seevals.data_types as types
+from seevals import agents, prompts
+from seevals.fake_lm import FakeLM
+
+
+@pytest.fixture
+def criteria() -> types.Criteria:
+    # a descriptive rubric with a scale so it is easy to find in the rendered prompts
+    return types.Criteria(rubrics=[types.Rubric(ge=0, le=3, desc="How clear the scenario is", scale="0 is bad, 3 is good")],
+                          max_total_score=3)
+
+
+def test_shared_prefix_adapter_moves_criteria_into_a_cached_system_message(criteria, grading_inputs):
+    module = agents.make_semantic_grader(agents.ScenarioArgs)
+    [system, user] = prompts.render_messages(module, grading_inputs(1), prompts.SharedPrefixAdapter())[0]
+
+    assert system["content"][0]["cache_control"] == prompts.CACHE_CONTROL
+    assert criteria.rubrics[0].desc in prompts.message_text(system)
+    assert "[[ ## criteria ## ]]" not in user["content"]
+    assert "[[ ## input ## ]]" in user["content"]
+
+
+def test_shared_prefix_caches_more_than_a_system_breakpoint(criteria, grading_inputs):
+    module = agents.make_rubric_grader(agents.ScenarioArgs, criteria)
+    inputs = grading_inputs(5)
+    system_only = prompts.render_messages(module, inputs, prompts.SharedPrefixAdapter(shared=()))
+    shared = prompts.render_messages(module, inputs, prompts.SharedPrefixAdapter())
+
+    assert prompts.cached_prefix_ratio(prompts.render_messages(module, inputs, dspy.ChatAdapter())) == 0.0
+    assert prompts.cached_prefix_ratio(shared) > prompts.cached_prefix_ratio(system_only) > 0.0
+
+
+def test_cascade_gets_the_layout_and_parses(criteria, grading_inputs):
+    seen = []
+
+    def answer(messages):
+        seen.append(messages)
+        return {"reasoning": "r", "score": 3.0}
+
+    lm = FakeLM(answer)
+    grader = agents.make_cascade_grader(agents.ScenarioArgs, lm, lm)
+    with dspy.context(adapter=prompts.SharedPrefixAdapter()):
+        prediction = grader(grading_inputs(1)[0])
+
+    assert prediction.score == 3.0
+    assert criteria.rubrics[0].desc in prompts.message_text(seen[0][0])
+
+
+def test_prefix_reuse_ratio():
+    assert prompts.prefix_reuse_ratio(["abcd", "abcd"]) == 1.0
+    assert prompts.prefix_reuse_ratio(["abxy", "abzw", "qrst"]) == 4 / 12
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import seevals.data_types as types
+from seevals import agent_util, agents, execute
+from seevals.fake_lm import FakeLM
+
+CRITERIA = types.Criteria(rubrics=[
+    types.Rubric(ge=0, le=2, desc="a", scale="0 is bad, 1 is fair, 2 is good"),
+    types.Rubric(ge=0, le=3, desc="b"),
+], max_total_score=4)
+
+
+@pytest.mark.parametrize("answer, expected", [
+    ({"rubric_0": 1, "rubric_1": 2.5}, (1.0, 2.5)),
+    # off the scale and out of bounds scores are snapped instead of failing the parse
+    ({"rubric_0": 1.4, "rubric_1": 3.5}, (1.0, 3.0)),
+    ({"rubric_0": "1.6", "rubric_1": -1}, (2.0, 0.0)),
+])
+def test_scores_are_snapped_to_the_rubrics(answer, expected):
+    scores = agents.make_rubric_scores_model(CRITERIA).model_validate(answer)
+
+    assert (scores.rubric_0, scores.rubric_1) == expected
+
+
+def test_totals_above_the_maximum_are_flagged():
+    model = agents.make_rubric_scores_model(CRITERIA)
+
+    assert not model(rubric_0=1, rubric_1=3).exceeds_max_total
+    over = model(rubric_0=2, rubric_1=3)
+    assert over.total == 5.0
+    assert over.exceeds_max_total
+
+
+def test_score_matrix_of_a_rubric_grading_run():
+    answers = iter([{"rubric_0": 2, "rubric_1": 3}, {"rubric_0": 0, "rubric_1": 1.5}])
+    lm = FakeLM(lambda messages: {"reasoning": "r", "scores": next(answers)})
+    grader = agents.make_rubric_grader(agents.ScenarioArgs, CRITERIA)
+    inputs = agent_util.make_grading_inputs(CRITERIA, [agents.ScenarioArgs(scenario=str(i)) for i in range(2)])
+
+    grades = execute.run_parallel(grader, inputs, lm, 1)
+    # a call skipped by a budget
+    skipped = types.ResponseData(data=grades.data + [None], debug=grades.debug + [None])
+
+    matrix = agent_util.score_matrix(skipped, grader.scores_type)
+    np.testing.assert_array_equal(matrix[:2], [[2.0, 3.0], [0.0, 1.5]])
+    assert np.isnan(matrix[2]).all()
+    assert grades.data[0].exceeds_max_total
@@ -0,0 +1,86 @@
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from seevals import agents, execute, scheduler
+from seevals.fake_lm import FakeLM
+
+
+def test_weighted_jobs_share_capacity_by_weight():
+    fair = scheduler.FairScheduler(capacity=1)
+    heavy, light = fair.job("heavy", weight=2.0), fair.job("light", weight=1.0)
+    order = []
+    gate = threading.Event()
+
+    def call(job):
+        with job.slot():
+            gate.wait()
+            order.append(job.name)
+
+    with ThreadPoolExecutor(max_workers=30) as ex:
+        # hold the only slot until both jobs are backlogged
+        blocker = ex.submit(call, fair.job("blocker"))
+        time.sleep(0.05)
+        for job in [heavy] * 15 + [light] * 15:
+            ex.submit(call, job)
+        time.sleep(0.2)
+        gate.set()
+        blocker.result()
+
+    served = order[1:19]
+    assert served.count("heavy") == 12
+    assert served.count("light") == 6
+
+
+def test_interactive_jobs_go_first():
+    fair = scheduler.FairScheduler(capacity=1)
+    bulk, interactive = fair.job("bulk"), fair.job("check", priority=scheduler.INTERACTIVE)
+    order = []
+    gate = threading.Event()
+
+    def call(job):
+        with job.slot():
+            gate.wait()
+            order.append(job.name)
+
+    with ThreadPoolExecutor(max_workers=10) as ex:
+        ex.submit(call, fair.job("blocker"))
+        time.sleep(0.05)
+        for _ in range(5):
+            ex.submit(call, bulk)
+        time.sleep(0.05)
+        ex.submit(call, interactive)
+        time.sleep(0.1)
+        gate.set()
+
+    assert order[1] == "check"
+
+
+def test_file_slots_cap_concurrency_of_a_run(tmp_path, grading_inputs):
+    slots = scheduler.FileSlots(str(tmp_path), capacity=2)
+    fair = scheduler.FairScheduler(capacity=8, slots=slots)
+    in_flight, peak = 0, 0
+    lock = threading.Lock()
+
+    def answer(messages):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return {"reasoning": "r", "score": 1.0}
+
+    grades = execute.run_parallel(agents.make_semantic_grader(agents.ScenarioArgs), grading_inputs(10),
+                                  FakeLM(answer), 8, job=fair.job("run"))
+
+    assert grades.data == [1.0] * 10
+    assert peak <= 2
+
+
+def test_execute_imports_without_fcntl():
+    # fcntl only exists on POSIX, only FileSlots needs it
+    code = "import sys; sys.modules['fcntl'] = None; import seevals.execute"
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,52 @@
+import dspy
+from seevals import agents, prompts, schema
+from seevals.fake_lm import FakeLM
+
+
+def test_compact_schema_keeps_additional_properties():
+    rendered = schema.compact_schema(agents.QABaseModel)
+
+    assert '"additionalProperties":false' in rendered
+    assert '"title"' not in rendered
+
+
+def test_adapter_renders_compact_schema_in_module_prompts(criteria):
+    module = agents.make_contrastive_grader(agents.ScenarioArgs)
+    inputs = [agents.ContrastiveInput(criteria=criteria, noise_factor=0.5,
+                                      input=agents.ScenarioArgs(scenario="a"))]
+    full = prompts.render_prompts(module, inputs)[0]
+    with dspy.context(adapter=schema.CompactSchemaAdapter()):
+        compact = prompts.render_prompts(module, inputs)[0]
+
+    assert schema.compact_schema(agents.ScenarioArgs) in compact
+    assert schema.compact_schema(agents.ScenarioArgs) not in full
+    assert len(compact) < len(full)
+
+
+def test_adapter_parses_structured_outputs(criteria):
+    module = agents.make_contrastive_grader(agents.ScenarioArgs)
+    lm = FakeLM({"reasoning": "r", "output": agents.ScenarioArgs(scenario="b")})
+    with dspy.context(lm=lm, adapter=schema.CompactSchemaAdapter()):
+        prediction = module(agents.ContrastiveInput(criteria=criteria, noise_factor=0.5,
+                                                    input=agents.ScenarioArgs(scenario="a")))
+
+    assert module.get_value(prediction) == agents.ScenarioArgs(scenario="b")
+
+
+def test_signature_token_report_counts_savings_of_the_adapter(criteria):
+    module = agents.make_rubric_grader(agents.ScenarioArgs, criteria)
+    [count] = schema.signature_token_report([module.grader.predict.signature])
+
+    assert count.saved > 0
+
+
+def test_signature_token_report_restores_embedded_schemas_only_when_asked():
+    [plain] = schema.signature_token_report([agents.InterviewAnalysis])
+    # rendering other schemas does not change the report
+    schema.compact_schema(agents.ScenarioArgs)
+    assert schema.signature_token_report([agents.InterviewAnalysis]) == [plain]
+
+    [embedded] = schema.signature_token_report([agents.InterviewAnalysis], embedded=[agents.QABaseModel])
+
+    assert embedded.after == plain.after
+    assert embedded.before > plain.before
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+from seevals import agents, work_queue
+from seevals.fake_lm import FakeLM
+
+INPUT_TYPE = agents.GradingInput[agents.ScenarioArgs]
+
+
+def worker_spec() -> work_queue.WorkerSpec:
+    return work_queue.WorkerSpec(module=agents.make_semantic_grader(agents.ScenarioArgs),
+                                 lm=FakeLM({"reasoning": "r", "score": 2.0}), input_type=INPUT_TYPE)
+
+
+def test_wait_fails_expired_leases_at_max_attempts(tmp_path, grading_inputs):
+    queue = work_queue.WorkQueue(str(tmp_path / "q.db"), lease_seconds=0.0, max_attempts=1)
+    queue.enqueue("run", grading_inputs(2), INPUT_TYPE)
+    # the worker died holding both leases
+    assert len(queue.lease("run", "dead", limit=2)) == 2
+
+    grades = queue.wait("run", float, poll_interval=0.01, timeout=5.0)
+
+    assert grades.data == [None, None]
+    assert queue.progress("run") == {"failed": 2}
+
+
+def test_wait_times_out_on_expired_leases_with_attempts_left(tmp_path, grading_inputs):
+    queue = work_queue.WorkQueue(str(tmp_path / "q.db"), lease_seconds=0.0, max_attempts=3)
+    queue.enqueue("run", grading_inputs(1), INPUT_TYPE)
+    queue.lease("run", "dead")
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        queue.wait("run", float, poll_interval=0.01, timeout=0.2)
+    assert time.monotonic() - start < 2.0
+
+
+# DELETE is the rollback journal used for databases on shared mounts
+@pytest.mark.parametrize("journal_mode", ["WAL", "DELETE"])
+def test_worker_processes_share_a_run(tmp_path, grading_inputs, journal_mode):
+    path = str(tmp_path / "q.db")
+    queue = work_queue.WorkQueue(path, journal_mode=journal_mode)
+    queue.enqueue("run", grading_inputs(20), INPUT_TYPE)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(["src", os.environ.get("PYTHONPATH", "")]))
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    workers = [subprocess.Popen([sys.executable, "-m", "seevals.work_queue", "work", path, "run",
+                                 "tests.test_work_queue:worker_spec", "--concurrency", "2",
+                                 "--journal-mode", journal_mode],
+                                cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+               for _ in range(2)]
+
+    grades = queue.wait("run", float, poll_interval=0.05, timeout=60.0)
+
+    for worker in workers:
+        assert worker.wait(timeout=60) == 0
+    assert grades.data == [2.0] * 20
+    assert queue._connection().execute("PRAGMA journal_mode").fetchone()[0] == journal_mode.lower()